@@ -1,184 +1,766 @@
 import os
+import re
 import time
+import uuid
+import heapq
+import random
+import socket
+import functools
+import itertools
 import mimetypes
 import threading
+import http.client
+import json
+import logging
 import requests
-from queue import Queue, Empty
-from typing import Dict
+from collections import namedtuple, deque
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connection import HTTPConnection
+from queue import Empty
+from typing import Dict, List, Optional
+from upload_cache import shared_upload_cache
+
+logger = logging.getLogger(__name__)
+
+# Number of upload worker threads. Uploads are I/O bound and requests releases the GIL
+# while waiting on the socket, so plain threads are enough to keep uploads in flight
+MAX_CONCURRENT_UPLOADS = 5
+
+# Connection pool sizing for the shared upload session
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 16
+
+# TCP keepalive probing so a dead server is noticed within ~1 minute instead of hanging a worker
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_PROBES = 3
+
+# How long a remote folder listing is trusted when checking for files that already exist
+REMOTE_LISTING_TTL = 30
+
+# Default size of each block read from disk and written to the socket while streaming an upload.
+# Large blocks mean fewer read/send (and TLS record) calls per MB; see FileUploader(upload_chunk_size=...)
+UPLOAD_BLOCK_SIZE = 2 * 1024 * 1024
+
+# Files above this size are handed to the kernel with sendfile when the server is plain HTTP
+SENDFILE_THRESHOLD = 16 * 1024 * 1024
+
+# Error messages that point at a network problem, which triggers the auto-recovery monitor
+_NETWORK_ERROR_RE = re.compile(r'ConnectionError|Timeout|Connection aborted|forcibly closed|timed out|Network error')
+
+# Number of recent upload failures kept for retrying
+MAX_FAILED_UPLOAD_DETAILS = 100
+
+# Server-side failures that are retried automatically with exponential backoff and jitter.
+# Network errors are handled separately by the recovery monitor
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_UPLOAD_RETRIES = 4
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# Total time stop() waits for all worker threads to exit
+STOP_JOIN_TIMEOUT = 5.0
+
+# Uploader run states
+RUNNING = 'running'
+PAUSED = 'paused'
+STOPPED = 'stopped'
+
+# Upload settings shared by reference by every file queued with them
+_UploadContext = namedtuple('_UploadContext', ['base_url', 'api_token', 'callbacks', 'base_path'])
+
+# Minimal stand-in for requests.Response returned by the sendfile upload path
+_SendfileResponse = namedtuple('_SendfileResponse', ['status_code', 'text', 'headers'])
+
+def _parse_timestamp(value) -> Optional[float]:
+    """Seconds since the epoch for an ISO 8601 API timestamp, or None if it can't be read"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+class _RetryUpload(Exception):
+    """Raised by _upload_file when a failed upload should be queued again after a delay"""
+    def __init__(self, delay: float, reason: str):
+        super().__init__(reason)
+        self.delay = delay
+
+@functools.lru_cache(maxsize=4096)
+def _guess_mime_type(extension: str) -> str:
+    """Guess a MIME type from a lowercase file extension (cached per extension)"""
+    return mimetypes.guess_type(f"file{extension}")[0] or 'application/octet-stream'
+
+class _MultipartBody:
+    """Streams a single-file multipart body (preamble, file contents, epilogue) with a known length.
+
+    Each worker keeps one instance and calls reset() per file; file data is read into the
+    instance's own buffer, so streaming an upload doesn't allocate a new bytes object per block.
+    """
+    def __init__(self, block_size: int = UPLOAD_BLOCK_SIZE):
+        self._buffer = bytearray(block_size)
+        self._view = memoryview(self._buffer)
+        self.reset(b'', None, 0, b'')
+
+    def reset(self, preamble: bytes, f, file_size: int, epilogue: bytes) -> '_MultipartBody':
+        self._head = preamble
+        self._f = f
+        self._tail = epilogue
+        self._length = len(preamble) + file_size + len(epilogue)
+        return self
+
+    def __len__(self):
+        # requests uses this for Content-Length instead of falling back to chunked encoding
+        return self._length
+
+    def read(self, size: int = -1):
+        # The small preamble and epilogue are returned whole
+        if self._head:
+            head, self._head = self._head, b''
+            return head
+        if self._f is not None:
+            # The returned view is only valid until the next read - urllib3 sends each block before reading on
+            view = self._view if size is None or size < 0 else self._view[:size]
+            count = self._f.readinto(view)
+            if count:
+                return view[:count]
+            self._f = None
+        tail, self._tail = self._tail, b''
+        return tail
+
+def _upload_socket_options() -> list:
+    """urllib3's defaults (TCP_NODELAY) plus keepalive probing where the platform supports it"""
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in (('TCP_KEEPIDLE', KEEPALIVE_IDLE), ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL),
+                        ('TCP_KEEPCNT', KEEPALIVE_PROBES)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+class _UploadAdapter(HTTPAdapter):
+    """HTTPAdapter that applies the upload socket options and block size to every pooled connection"""
+    def __init__(self, blocksize: int = UPLOAD_BLOCK_SIZE, **kwargs):
+        self.blocksize = blocksize  # Set first - HTTPAdapter.__init__ creates the pool manager
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', _upload_socket_options())
+        kwargs.setdefault('blocksize', self.blocksize)
+        super().init_poolmanager(*args, **kwargs)
+
+class _WorkStealingQueue:
+    """Queue-compatible task queue with one deque per worker; idle workers steal from their peers"""
+    _NOTHING = object()
+
+    def __init__(self, num_workers: int):
+        self._deques = [deque() for _ in range(max(1, num_workers))]
+        self._round_robin = itertools.cycle(range(len(self._deques)))
+        self._worker_indexes = itertools.count()
+        self._worker = threading.local()
+        # Only idle workers wait on this, so busy workers never touch a shared lock to get tasks
+        self._work_available = threading.Condition()
+        self._idle = 0
+        self._all_done = threading.Condition()
+        self._unfinished = 0
+
+    def _take(self, index: int):
+        """Pop from our own deque first, then steal from the other end of a peer's"""
+        try:
+            return self._deques[index].popleft()
+        except IndexError:
+            pass
+        for offset in range(1, len(self._deques)):
+            try:
+                return self._deques[(index + offset) % len(self._deques)].pop()
+            except IndexError:
+                continue
+        return self._NOTHING
+
+    def put(self, item, block: bool = True, timeout: float = None):
+        with self._all_done:
+            self._unfinished += 1
+        self._deques[next(self._round_robin)].append(item)
+        if self._idle:
+            with self._work_available:
+                self._work_available.notify()
+
+    def get(self, block: bool = True, timeout: float = None):
+        index = getattr(self._worker, 'index', None)
+        if index is None:
+            index = self._worker.index = next(self._worker_indexes) % len(self._deques)
+
+        item = self._take(index)
+        if item is not self._NOTHING:
+            return item
+        if not block:
+            raise Empty
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._work_available:
+            # Register as idle before re-checking so a concurrent put() can't miss us
+            self._idle += 1
+            try:
+                while True:
+                    item = self._take(index)
+                    if item is not self._NOTHING:
+                        return item
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Empty
+                    self._work_available.wait(remaining)
+            finally:
+                self._idle -= 1
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def task_done(self):
+        with self._all_done:
+            if self._unfinished <= 0:
+                raise ValueError('task_done() called too many times')
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._all_done.notify_all()
+
+    def join(self):
+        with self._all_done:
+            while self._unfinished:
+                self._all_done.wait()
+
+    def discard(self, item) -> int:
+        """Remove every queued occurrence of item, marking each done; call while no worker is taking tasks"""
+        removed = 0
+        for tasks in self._deques:
+            # Rotate through the deque once, keeping everything else in its original order
+            for _ in range(len(tasks)):
+                try:
+                    task = tasks.popleft()
+                except IndexError:
+                    break
+                if task is item:
+                    removed += 1
+                else:
+                    tasks.append(task)
+        for _ in range(removed):
+            self.task_done()
+        return removed
+
+    def qsize(self) -> int:
+        return sum(len(d) for d in self._deques)
+
+    @property
+    def unfinished_tasks(self) -> int:
+        """Tasks put but not yet marked done, including ones a worker is still handling"""
+        return self._unfinished
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+class _UploadState:
+    """Run state shared by the uploader and its workers; every change wakes anyone waiting on it"""
+    def __init__(self):
+        self._changed = threading.Condition()
+        self.value = RUNNING
+
+    def set(self, value: str, only_from: tuple = None) -> bool:
+        """Switch to value (optionally only from one of the given states) and wake all waiters"""
+        with self._changed:
+            if only_from is not None and self.value not in only_from:
+                return False
+            self.value = value
+            self._changed.notify_all()
+            return True
+
+    def wait_while(self, value: str, timeout: float = None) -> str:
+        """Sleep while the state equals value and return the state we woke up in"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.value != value, timeout)
+            return self.value
+
+    def wait_for(self, value: str, timeout: float = None) -> bool:
+        """Sleep until the state equals value; returns False on timeout"""
+        return self.wait_until(lambda: self.value == value, timeout)
+
+    def wait_until(self, predicate, timeout: float = None) -> bool:
+        """Sleep until predicate() is true, re-checking on every state change or notify()"""
+        with self._changed:
+            return self._changed.wait_for(predicate, timeout)
+
+    def notify(self):
+        """Wake all waiters so they re-check their conditions"""
+        with self._changed:
+            self._changed.notify_all()
+
+class _StateFlag:
+    """Event-like view of one run state, so pause_flag/stop_flag keep working for callers"""
+    def __init__(self, state: _UploadState, value: str):
+        self._state = state
+        self._value = value
+
+    def is_set(self) -> bool:
+        return self._state.value == self._value
+
+    def set(self):
+        self._state.set(self._value)
+
+    def clear(self):
+        self._state.set(RUNNING, only_from=(self._value,))
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._state.wait_for(self._value, timeout)
+
+class _UploadSession(requests.Session):
+    """Session that refuses to start new requests once the uploader has been stopped"""
+    def __init__(self, state: _UploadState):
+        super().__init__()
+        self._state = state
+
+    def request(self, *args, **kwargs):
+        if self._state.value == STOPPED:
+            raise requests.exceptions.ConnectionError("Uploads were stopped")
+        return super().request(*args, **kwargs)
+
+class _WorkerBody(threading.local):
+    """Per-worker reusable multipart body"""
+    def __init__(self, block_size: int):
+        self.body = _MultipartBody(block_size)
+
+class _ThreadCounter:
+    """Counter that threads bump without locking - each thread only ever writes its own slot"""
+    def __init__(self):
+        self._slots = {}  # thread ident -> that thread's running total
+
+    def add(self, amount: int = 1):
+        ident = threading.get_ident()
+        self._slots[ident] = self._slots.get(ident, 0) + amount
+
+    @property
+    def value(self) -> int:
+        # Copying the values is a single C-level call under the GIL, so no writer can interleave
+        return sum(list(self._slots.values()))
+
+    def reset(self, value: int = 0):
+        self._slots = {threading.get_ident(): value} if value else {}
 
 class FileUploader:
-    def __init__(self, num_threads: int = 5):
-        self.upload_queue = Queue()
+    def __init__(self, num_threads: int = MAX_CONCURRENT_UPLOADS, upload_chunk_size: int = UPLOAD_BLOCK_SIZE):
+        self.upload_queue = _WorkStealingQueue(num_threads)
         self.upload_threads = []
-        self.stop_flag = threading.Event()
-        self.pause_flag = threading.Event()
+        self._state = _UploadState()
+        self.stop_flag = _StateFlag(self._state, STOPPED)
+        self.pause_flag = _StateFlag(self._state, PAUSED)
         self.lock = threading.Lock()
         self.num_threads = num_threads
-        self.total_uploaded = 0
-        self.total_size = 0
-        self.current_speed = 0
-        self._bytes_since_last_update = 0
-        self._speed_update_time = time.time()
+        # Use a smaller chunk size (e.g. 64 KiB) to save memory when syncing mostly small files
+        self.upload_chunk_size = upload_chunk_size
+        # Completion and size counters are bumped without locks; read them via the properties below
+        self._total_uploaded = _ThreadCounter()
+        self._total_size = _ThreadCounter()
+        self._uploaded_bytes = _ThreadCounter()
+        self._worker_body = _WorkerBody(upload_chunk_size)
+        self._speed_lock = threading.Lock()
+        self._reset_speed()
+        self._normalized_base_paths = {}  # base_path -> normalized path ending with os.sep
+        # Network recovery state
+        self.network_issues_detected = False
+        self.network_monitor_active = False
+        self.network_recovery_callback = None
+        self._prepare_multipart_template()
+        self.session = self._create_session()
+        self._session_token = None  # Token currently set as the session's Authorization header
+        self._upload_context = None  # Context of the most recently queued file, reused while unchanged
+        self._parent_id_bytes = {}  # target folder ID -> encoded multipart field value
+        # Structured details of recent failures; the oldest are dropped automatically
+        self.failed_uploads_details = deque(maxlen=MAX_FAILED_UPLOAD_DETAILS)
+        # Uploads waiting out a backoff after a transient server error
+        self._retry_cond = threading.Condition()
+        self._retry_heap = []  # (due time, sequence, task)
+        self._retry_seq = itertools.count()
+        self._retry_attempts = {}  # (file path, folder ID) -> retries used
+        self._retry_thread = None
+        self.upload_cache = shared_upload_cache()  # Files already uploaded, skipped when unchanged
+        # Before uploading, check the target folder's listing for a file with the same name and size
+        # that was stored after the local file last changed (opt-in from the control panel: costs a listing per folder)
+        self.enable_dedupe_probe = False
+        self._remote_listings = {}  # (base_url, folder ID) -> (fetch time, {name: (size, id, updated)})
+        self._remote_listing_lock = threading.Lock()
+        self._remote_listing_fetches = {}  # (base_url, folder ID) -> lock held while fetching that listing
+
+    def _create_session(self) -> requests.Session:
+        """Create a pooled session so TCP/TLS connections are reused across uploads"""
+        session = _UploadSession(self._state)
+        # Keep at least one pooled keep-alive connection per worker; urllib3 discards
+        # connections beyond pool_maxsize, which would force a new TCP/TLS handshake.
+        # pool_block makes a worker wait for a free connection rather than open a throwaway one
+        adapter = _UploadAdapter(
+            blocksize=self.upload_chunk_size,
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=max(POOL_MAXSIZE, self.num_threads),
+            pool_block=True,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _prepare_multipart_template(self):
+        """Pre-format the fixed multipart layout (one parentId field, one file) for this uploader"""
+        boundary = f"----FolderFort{uuid.uuid4().hex}"
+        self._multipart_content_type = f"multipart/form-data; boundary={boundary}"
+        self._multipart_head = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="parentId"\r\n\r\n%s\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="%s"\r\n'
+            f'Content-Type: %s\r\n\r\n'
+        ).encode('ascii')
+        self._multipart_epilogue = f'\r\n--{boundary}--\r\n'.encode('ascii')
+
+        self._multipart_headers = {'Content-Type': self._multipart_content_type}
+
+    def _multipart_preamble(self, target_folder_id: int, file_name: str, mime_type: str) -> bytes:
+        """Fill the cached multipart template for one file"""
+        # Most files in a sync share a handful of parent folders, so reuse the encoded ID
+        parent_id = self._parent_id_bytes.get(target_folder_id)
+        if parent_id is None:
+            parent_id = self._parent_id_bytes[target_folder_id] = str(target_folder_id).encode('ascii')
+        quoted_name = file_name.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+        return self._multipart_head % (parent_id, quoted_name.encode('utf-8'), mime_type.encode('ascii'))
+
+    def _set_session_token(self, api_token: str):
+        """Keep the bearer token on the session so uploads don't build an auth header each time"""
+        if api_token != self._session_token:
+            self.session.headers['Authorization'] = f'Bearer {api_token}'
+            self._session_token = api_token
 
     def start(self):
         """Start the upload worker threads"""
         self.start_upload_workers()
 
-    def start_upload_workers(self):
+    def start_upload_workers(self, api_token: str = None):
         """Start the upload worker threads - used by sync_app.py"""
-        # Clear pause flag when starting workers
-        self.pause_flag.clear()
-        # Clear stop flag when starting workers
-        self.stop_flag.clear()
+        if api_token is not None:
+            self._set_session_token(api_token)
+
+        # Clear any pause or stop when starting workers
+        self._state.set(RUNNING)
 
         # Only start new threads if we don't have active ones
-        if not self.upload_threads or all(not t.is_alive() for t in self.upload_threads):
-            self.upload_threads = []
+        if not self.active_threads():
+            # Workers that exited on the stop state never took their stop sentinels; new workers would
+            self.upload_queue.discard(None)
+            threads = []
             for i in range(self.num_threads):
                 thread = threading.Thread(target=self._upload_worker, name=f"UploadWorker-{i+1}")
                 thread.daemon = True
                 thread.start()
-                self.upload_threads.append(thread)
-                print(f"Started upload worker thread: {thread.name}")
-
-    def _update_speed(self, bytes_uploaded: int):
-        """Update the upload speed"""
-        self._bytes_since_last_update += bytes_uploaded
-        current_time = time.time()
-        elapsed = current_time - self._speed_update_time
-
-        if elapsed >= 1.0:  # Update speed every second
-            self.current_speed = self._bytes_since_last_update / elapsed
-            self._bytes_since_last_update = 0
-            self._speed_update_time = current_time
+                threads.append(thread)
+                logger.debug("Started upload worker thread: %s", thread.name)
+            # Publish the finished list in one assignment so other threads never see it half built
+            self.upload_threads = threads
+
+    def active_threads(self) -> List[threading.Thread]:
+        """Snapshot of the worker threads that are still running"""
+        return [t for t in self.upload_threads if t.is_alive()]
+
+    def pending_uploads(self) -> int:
+        """Files queued but not yet handled, not counting one the calling worker is reporting on"""
+        pending = self.upload_queue.unfinished_tasks
+        # A worker still holds its file's task while its callbacks run; files skipped at queue
+        # time are reported from the caller's thread and never had a task
+        if getattr(threading.current_thread(), 'current_file', None):
+            pending -= 1
+        return max(pending, 0)
+
+    def _report_missing(self, file_path: str, callbacks: Dict):
+        """Report a queued file that no longer exists"""
+        if callbacks.get('on_error'):
+            callbacks['on_error'](f"File not found: {file_path}")
+
+    @property
+    def total_uploaded(self) -> int:
+        return self._total_uploaded.value
+
+    @total_uploaded.setter
+    def total_uploaded(self, value: int):
+        self._total_uploaded.reset(value)
+
+    @property
+    def total_size(self) -> int:
+        return self._total_size.value
+
+    @total_size.setter
+    def total_size(self, value: int):
+        self._total_size.reset(value)
+
+    def _report_skipped(self, file_path: str, callbacks: Dict):
+        """Count a file that didn't need uploading as done"""
+        self._total_uploaded.add()
+        if callbacks and callbacks.get('on_success'):
+            callbacks['on_success'](file_path, self.current_speed)
+
+    def _remote_folder_files(self, base_url: str, folder_id: int) -> dict:
+        """Files in a remote folder as {name: (size, id, updated)}, re-fetched at most every REMOTE_LISTING_TTL seconds"""
+        key = (base_url, folder_id)
+        with self._remote_listing_lock:
+            cached = self._remote_listings.get(key)
+            if cached is not None and time.monotonic() - cached[0] < REMOTE_LISTING_TTL:
+                return cached[1]
+            fetch_lock = self._remote_listing_fetches.setdefault(key, threading.Lock())
+
+        # Workers uploading into the same folder wait for one fetch instead of each listing it
+        with fetch_lock:
+            try:
+                with self._remote_listing_lock:
+                    cached = self._remote_listings.get(key)
+                if cached is not None and time.monotonic() - cached[0] < REMOTE_LISTING_TTL:
+                    return cached[1]
+                return self._fetch_remote_folder_files(base_url, folder_id)
+            finally:
+                # The listing is cached by now, so later callers don't need this folder's lock
+                with self._remote_listing_lock:
+                    if self._remote_listing_fetches.get(key) is fetch_lock:
+                        del self._remote_listing_fetches[key]
+
+    def _fetch_remote_folder_files(self, base_url: str, folder_id: int) -> dict:
+        """List a remote folder's files and cache the result"""
+        files = {}
+        page = 1
+        try:
+            while True:
+                response = self.session.get(f"{base_url}/drive/file-entries",
+                                            params={'parentIds': [str(folder_id)], 'page': page}, timeout=10)
+                if response.status_code != 200:
+                    # A partial listing could hide files, so treat the folder as unknown
+                    files = {}
+                    break
+                data = response.json()
+                entries = data.get('data', []) if isinstance(data, dict) else data
+                for entry in entries:
+                    if isinstance(entry, dict) and entry.get('type') != 'folder' and 'name' in entry:
+                        files[entry['name']] = (entry.get('file_size'), entry.get('id'),
+                                                _parse_timestamp(entry.get('updated_at')))
+                if not isinstance(data, dict) or page >= (data.get('last_page') or 1):
+                    break
+                page += 1
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # Without a listing every file is simply uploaded
+            logger.warning("Could not list remote folder %s: %s", folder_id, e)
+            files = {}
+
+        with self._remote_listing_lock:
+            self._remote_listings[(base_url, folder_id)] = (time.monotonic(), files)
+        return files
+
+    def _remote_exists(self, base_url: str, folder_id: int, file_name: str, file_stat: os.stat_result):
+        """Return the remote ID if the folder holds this file with the same size, stored after its last local change"""
+        remote = self._remote_folder_files(base_url, folder_id).get(file_name)
+        if remote is None or remote[0] != file_stat.st_size:
+            return None
+        # Without a remote timestamp a same-sized file can't be told apart from an older version
+        if remote[2] is None or remote[2] < file_stat.st_mtime:
+            return None
+        return remote[1] or ''
+
+    def _commit_file(self, file_size: int):
+        """Count a completed upload - only touches this worker's own counter slots"""
+        self._total_uploaded.add()
+        self._uploaded_bytes.add(file_size)
+
+    def _reset_speed(self):
+        """Reset speed sampling state"""
+        self._current_speed = 0
+        self._speed_sample_bytes = self._uploaded_bytes.value
+        self._speed_sample_time = time.monotonic()
+
+    @property
+    def current_speed(self) -> float:
+        """Upload speed in bytes/s, sampled from the byte counter at most once a second"""
+        if time.monotonic() - self._speed_sample_time >= 1.0 and self._speed_lock.acquire(blocking=False):
+            # Whichever reader gets the lock refreshes the sample; others use the cached value
+            try:
+                now = time.monotonic()
+                uploaded = self._uploaded_bytes.value
+                self._current_speed = (uploaded - self._speed_sample_bytes) / (now - self._speed_sample_time)
+                self._speed_sample_bytes = uploaded
+                self._speed_sample_time = now
+            finally:
+                self._speed_lock.release()
+        return self._current_speed
 
     def _upload_worker(self):
         """Worker thread for processing uploads"""
         thread = threading.current_thread()
         thread.current_file = None  # Add tracking for current file being processed
-        print(f"Upload worker thread started: {thread.name}")
-        # Pre-create the event object for reuse to reduce object creation overhead
-        paused_or_stopped = threading.Event()
+        logger.debug("Upload worker thread started: %s", thread.name)
 
         while not self.stop_flag.is_set():
             try:
                 # Clear current file when not processing
                 thread.current_file = None
-                
-                # Check if paused - optimized pause handling
+
+                # Sleep while paused - resume() and stop() wake us by changing the state
                 if self.pause_flag.is_set():
-                    # When paused, check periodically but don't consume CPU
-                    print(f"Worker {thread.name} paused, waiting...")
-
-                    # Use a single wait loop with short timeouts
-                    # This allows the thread to be woken up when the pause flag is cleared
-                    # while minimizing CPU usage
-                    while self.pause_flag.is_set() and not self.stop_flag.is_set():
-                        # Event.wait returns immediately if the event is set
-                        # Otherwise, it waits for the specified timeout
-                        # This is more efficient than a sleep loop
-                        paused_or_stopped.clear()
-                        paused_or_stopped.wait(timeout=0.2)
+                    logger.debug("Worker %s paused, waiting...", thread.name)
 
                     # Only print this message if we're continuing (not stopping)
-                    if not self.stop_flag.is_set():
-                        print(f"Worker {thread.name} continuing after pause")
+                    if self._state.wait_while(PAUSED) != STOPPED:
+                        logger.debug("Worker %s continuing after pause", thread.name)
                     else:
-                        print(f"Worker {thread.name} exiting after pause due to stop flag")
+                        logger.debug("Worker %s exiting after pause due to stop flag", thread.name)
                         break
                     continue
 
-                # Check if queue is empty
-                try:
-                    # Use a timeout to allow checking stop flag
-                    upload_task = self.upload_queue.get(timeout=1.0)
-                except Empty:
-                    # Correctly catch the Empty exception from queue module
-                    time.sleep(0.1)  # Avoid busy-waiting
-                    continue
-                except Exception as e:
-                    print(f"Error getting task from queue: {str(e)}")
-                    time.sleep(0.1)
-                    continue
+                # Block until there is work; stop() wakes us with a None sentinel
+                upload_task = self.upload_queue.get()
 
                 # Handle termination signal
                 if upload_task is None:
-                    print(f"Worker thread {thread.name} received termination signal")
+                    logger.debug("Worker thread %s received termination signal", thread.name)
                     self.upload_queue.task_done()
                     break
 
                 # Process the upload task
                 try:
-                    if len(upload_task) == 6:
-                        file_path, target_folder_id, base_url, api_token, callbacks, base_path = upload_task
-                    else:
-                        # Handle older format for backward compatibility
-                        file_path, target_folder_id, base_url, api_token, callbacks = upload_task
-                        base_path = None
+                    file_path, target_folder_id, context, file_stat = upload_task
+                    callbacks = context.callbacks
 
                     # Set current file for tracking
                     thread.current_file = file_path
                     
                     # Check if we should still proceed (might have been stopped/paused)
                     if self.stop_flag.is_set():
-                        print(f"Worker thread {thread.name} detected stop flag, breaking")
-                        thread.current_file = None  # Clear current file
-                        self.upload_queue.task_done()
+                        logger.debug("Worker thread %s detected stop flag, breaking", thread.name)
+                        self._finish_task(thread)
                         break
 
                     # Check for pause flag
                     if self.pause_flag.is_set():
-                        print(f"Worker thread {thread.name} is paused, returning task to queue")
+                        logger.debug("Worker thread %s is paused, returning task to queue", thread.name)
                         # If paused during processing, put task back in queue
                         self.upload_queue.put(upload_task)
-                        thread.current_file = None  # Clear current file
-                        self.upload_queue.task_done()
-                        time.sleep(0.5)
+                        self._finish_task(thread)
                         continue
 
                     # Proceed with upload
-                    self._upload_file(file_path, target_folder_id, base_url, api_token, callbacks, base_path)
+                    self._upload_file(file_path, target_folder_id, context.base_url, context.api_token, callbacks,
+                                      context.base_path, file_stat)
 
                     # Clear current file after completion
-                    thread.current_file = None
-                    self.upload_queue.task_done()
+                    self._finish_task(thread)
+                except _RetryUpload as retry:
+                    # The task stays unfinished until the scheduler re-queues it, so join() keeps waiting
+                    if callbacks.get('on_notice'):
+                        callbacks['on_notice'](f"Retrying {os.path.basename(file_path)} in {retry.delay:.1f}s ({retry})")
+                    self._schedule_retry(upload_task, retry.delay)
+                    self._finish_task(thread, task_done=False)
                 except Exception as e:
-                    print(f"Error processing upload task: {str(e)}")
+                    logger.error("Error processing upload task: %s", e)
                     if callbacks and 'on_error' in callbacks:
                         callbacks['on_error'](str(e))
                     # Clear current file on error
-                    thread.current_file = None
-                    self.upload_queue.task_done()
+                    self._finish_task(thread)
 
             except Exception as e:
-                print(f"Worker thread error: {str(e)}")
+                logger.error("Worker thread error: %s", e)
                 if 'callbacks' in locals() and callbacks and 'on_error' in callbacks:
                     callbacks['on_error'](str(e))
                 # Clear current file on error
-                thread.current_file = None
-                time.sleep(0.5)  # Avoid rapid error cycles
+                self._clear_current_file(thread)
+                self.stop_flag.wait(timeout=0.5)  # Avoid rapid error cycles
 
         # Clear current file when exiting
-        thread.current_file = None
-        print(f"Worker thread {thread.name} exiting")
+        self._clear_current_file(thread)
+        logger.debug("Worker thread %s exiting", thread.name)
+
+    def _finish_task(self, thread: threading.Thread, task_done: bool = True):
+        """Mark the worker's current task done and wake the pause monitor if it is waiting on us"""
+        if task_done:
+            self.upload_queue.task_done()
+        self._clear_current_file(thread)
 
-    # Register a callback to be called when pause is complete
-    def register_pause_complete_callback(self, callback):
-        """Register a callback to be notified when all in-progress uploads complete after pause"""
-        self.pause_complete_callback = callback
+    def _clear_current_file(self, thread: threading.Thread):
+        """Mark the worker idle; wait_for_pause re-checks the workers whenever one goes idle while paused"""
+        thread.current_file = None
+        if self.pause_flag.is_set():
+            self._state.notify()
+
+    def _next_retry_delay(self, key: tuple, retry_after: str = None):
+        """Backoff before the next attempt of a failed upload, or None once it has used up its retries"""
+        with self._retry_cond:
+            attempt = self._retry_attempts.get(key, 0)
+            if attempt >= MAX_UPLOAD_RETRIES:
+                self._retry_attempts.pop(key, None)
+                return None
+            self._retry_attempts[key] = attempt + 1
+
+        # Jitter spreads out retries of files that failed together, so they don't hit the server at once
+        delay = RETRY_BASE_DELAY * 2 ** attempt * (1 + random.random() * 0.5)
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                pass  # HTTP-date form; keep the computed backoff
+        return min(delay, RETRY_MAX_DELAY)
+
+    def _schedule_retry(self, task: tuple, delay: float):
+        """Queue an upload task again once delay seconds have passed"""
+        with self._retry_cond:
+            heapq.heappush(self._retry_heap, (time.monotonic() + delay, next(self._retry_seq), task))
+            if self._retry_thread is None:
+                self._retry_thread = threading.Thread(target=self._run_retry_scheduler,
+                                                      name="UploadRetryScheduler", daemon=True)
+                self._retry_thread.start()
+            self._retry_cond.notify()
+
+    def _run_retry_scheduler(self):
+        """Move due retries back onto the upload queue; exits when none are pending"""
+        with self._retry_cond:
+            while self._retry_heap:
+                wait = self._retry_heap[0][0] - time.monotonic()
+                if wait > 0:
+                    self._retry_cond.wait(wait)
+                    continue
+                task = heapq.heappop(self._retry_heap)[2]
+                # Re-queue before finishing the failed attempt so upload_queue.join() never sees zero
+                self.upload_queue.put(task)
+                self.upload_queue.task_done()
+            self._retry_thread = None
+
+    def _drop_pending_retries(self):
+        """Forget scheduled retries, finishing their tasks so upload_queue.join() can return"""
+        with self._retry_cond:
+            dropped = len(self._retry_heap)
+            self._retry_heap.clear()
+            self._retry_attempts.clear()
+            self._retry_cond.notify()
+        for _ in range(dropped):
+            self.upload_queue.task_done()
+
+    def wait_for_pause(self, timeout: float = None) -> bool:
+        """Block until no worker is in the middle of a file, or uploads were resumed or stopped.
+        Returns False on timeout"""
+        def settled():
+            return (not self.pause_flag.is_set()
+                    or not any(getattr(t, 'current_file', None) for t in self.upload_threads))
+
+        # Workers notify the state condition as they finish tasks while paused
+        return self._state.wait_until(settled, timeout=timeout)
 
     # Track network status for auto-recovery
     def set_network_recovery_callback(self, callback):
         """Set callback for network recovery detection"""
         self.network_recovery_callback = callback
 
-    def _upload_file(self, file_path: str, target_folder_id: int, base_url: str, api_token: str, callbacks: Dict, base_path: str = None):
+    def _upload_file(self, file_path: str, target_folder_id: int, base_url: str, api_token: str, callbacks: Dict,
+                     base_path: str = None, file_stat: os.stat_result = None):
         """Upload a single file with proper error handling"""
-        # Memory optimization: Limit size of failed_uploads_details list
-        if hasattr(self, 'failed_uploads_details') and len(self.failed_uploads_details) > 100:
-            # Keep only the 50 most recent failures
-            self.failed_uploads_details = self.failed_uploads_details[-50:]
-            
         try:
             # Check if stopped or paused before starting the upload
             if self.stop_flag.is_set():
@@ -191,16 +773,17 @@ class FileUploader:
                     callbacks['on_error'](f"Upload deferred for {file_path}: sync is paused")
                 return
 
-            # Verify file exists
-            if not os.path.exists(file_path):
-                error_msg = f"File not found: {file_path}"
-                if callbacks.get('on_error'):
-                    callbacks['on_error'](error_msg)
-                return
-
-            file_size = os.path.getsize(file_path)
+            # The file is normally stat'ed once at queue time and passed through; a file that has
+            # disappeared since is caught when opening it, so no separate existence check is needed
+            if file_stat is None:
+                try:
+                    file_stat = os.stat(file_path)
+                except FileNotFoundError:
+                    self._report_missing(file_path, callbacks)
+                    return
+            file_size = file_stat.st_size
             file_name = os.path.basename(file_path)
-            mime_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+            mime_type = _guess_mime_type(os.path.splitext(file_name)[1].lower())
 
             # For uploads, we don't need to calculate relative paths as we're using the direct parent ID
             # The API uses the parent ID to place the file in the correct folder
@@ -209,21 +792,29 @@ class FileUploader:
 
             # Prepare upload request
             upload_url = f"{base_url}/uploads"
-            headers = {'Authorization': f'Bearer {api_token}'}
-
-            with open(file_path, 'rb') as f:
-                # Create form data
-                files = {
-                    'file': (file_name, f, mime_type),
-                }
-                data = {
-                    'parentId': str(target_folder_id),
-                    # No need to include relativePath as we're uploading directly to the correct parent folder
-                }
+            self._set_session_token(api_token)
+
+            # Skip the upload when the target folder already has this file
+            if self.enable_dedupe_probe:
+                # Probe hits aren't written to the upload cache, so the next sync checks the folder again
+                if self._remote_exists(base_url, target_folder_id, file_name, file_stat) is not None:
+                    self._report_skipped(file_path, callbacks)
+                    return
+
+            try:
+                upload_file = open(file_path, 'rb')
+            except FileNotFoundError:
+                self._report_missing(file_path, callbacks)
+                return
+
+            with upload_file as f:
+                # Multipart body: parentId + file. No relativePath needed as we upload directly to the parent folder
+                preamble = self._multipart_preamble(target_folder_id, file_name, mime_type)
 
                 # Upload file
                 start_time = time.time()
-                print(f"Uploading {file_name} to folder ID: {target_folder_id} (path context: {rel_path})")
+                # Per-file messages go through logging so they cost only a level check when disabled
+                logger.debug("Uploading %s to folder ID: %s (path context: %s)", file_name, target_folder_id, rel_path)
 
                 # Check one more time before starting the actual request
                 if self.stop_flag.is_set():
@@ -233,20 +824,28 @@ class FileUploader:
 
                 # If paused, wait until resumed or stopped
                 if self.pause_flag.is_set():
-                    print(f"Upload of {file_name} paused before starting request")
-                    while self.pause_flag.is_set() and not self.stop_flag.is_set():
-                        time.sleep(0.1)
+                    logger.debug("Upload of %s paused before starting request", file_name)
 
                     # Check if we should still proceed after waiting
-                    if self.stop_flag.is_set():
+                    if self._state.wait_while(PAUSED) == STOPPED:
                         if callbacks.get('on_error'):
                             callbacks['on_error'](f"Upload cancelled for {file_path}")
                         return
-                    print(f"Resuming upload of {file_name} after pause")
+                    logger.debug("Resuming upload of %s after pause", file_name)
 
                 try:
                     # Use a timeout to make requests more interruptible
-                    response = requests.post(upload_url, headers=headers, files=files, data=data, timeout=30)
+                    if file_size > SENDFILE_THRESHOLD and upload_url.startswith('http://'):
+                        # Large file over plain HTTP - let the kernel copy the body with sendfile
+                        response = self._sendfile_post(upload_url, api_token, preamble, f, file_size, timeout=30)
+                    else:
+                        # Stream the multipart body from disk instead of buffering it in memory
+                        response = self.session.post(
+                            upload_url,
+                            headers=self._multipart_headers,
+                            data=self._worker_body.body.reset(preamble, f, file_size, self._multipart_epilogue),
+                            timeout=30
+                        )
 
                     # Check after request if we should continue processing the response
                     if self.stop_flag.is_set():
@@ -257,14 +856,23 @@ class FileUploader:
                     if response.status_code == 201:
                         elapsed = time.time() - start_time
                         speed = file_size / elapsed if elapsed > 0 else 0
-                        self._update_speed(file_size)
-
-                        with self.lock:
-                            self.total_uploaded += 1
+                        self._commit_file(file_size)
+                        if self._retry_attempts:
+                            self._retry_attempts.pop((file_path, target_folder_id), None)
+                        # Use the queue-time stat so a file changed mid-upload is sent again next sync
+                        self.upload_cache.record(base_url, target_folder_id, file_path, file_stat,
+                                                 self._remote_file_id(response))
 
                         if callbacks.get('on_success'):
                             callbacks['on_success'](file_path, self.current_speed)
                     else:
+                        # Transient server errors go back on the queue after a backoff
+                        if response.status_code in RETRYABLE_STATUSES:
+                            delay = self._next_retry_delay((file_path, target_folder_id),
+                                                           response.headers.get('Retry-After'))
+                            if delay is not None:
+                                raise _RetryUpload(delay, f"HTTP {response.status_code}")
+
                         # Include both filename and full path in error for retry functionality
                         error_msg = f"Upload failed for {file_name}: HTTP {response.status_code} - {response.text} (folder ID: {target_folder_id})"
                         if callbacks.get('on_error'):
@@ -288,6 +896,8 @@ class FileUploader:
                         callbacks['on_error'](f"Upload error for {file_path}: Network error - {str(e)}")
                     raise
 
+        except _RetryUpload:
+            raise
         except Exception as e:
             if callbacks.get('on_error'):
                 # Always include the file path as the first part after "Upload error for"
@@ -299,11 +909,7 @@ class FileUploader:
                 else:
                     callbacks['on_error'](error_msg)
 
-                # Store failed upload details for easier retry
-                if not hasattr(self, 'failed_uploads_details'):
-                    self.failed_uploads_details = []
-
-                # Store structured data about the failed upload
+                # Store structured data about the failed upload for easier retry
                 self.failed_uploads_details.append({
                     'file_path': file_path,
                     'target_folder_id': target_folder_id,
@@ -312,22 +918,55 @@ class FileUploader:
                 })
 
                 # Check if it's a network error for auto-recovery
-                network_errors = ['ConnectionError', 'Timeout', 'Connection aborted', 
-                            'forcibly closed', 'timed out', 'Network error']
-
-                if any(err in error_msg for err in network_errors):
-                    # Flag for potential auto-recovery
-                    if not hasattr(self, 'network_issues_detected'):
-                        self.network_issues_detected = True
-
-                        # Start network monitoring for auto-recovery if not already running
-                        if not hasattr(self, 'network_monitor_active') or not self.network_monitor_active:
+                if _NETWORK_ERROR_RE.search(error_msg):
+                    # Flag for potential auto-recovery and start network monitoring if not already running
+                    with self.lock:
+                        start_monitor = not self.network_issues_detected and not self.network_monitor_active
+                        if start_monitor:
+                            self.network_issues_detected = True
                             self.network_monitor_active = True
-                            threading.Thread(target=self._monitor_network_recovery, 
-                                            args=(base_url, api_token, callbacks),
-                                            daemon=True).start()
+                    if start_monitor:
+                        threading.Thread(target=self._monitor_network_recovery,
+                                         args=(base_url, api_token, callbacks),
+                                         daemon=True).start()
             raise
 
+    def _sendfile_post(self, upload_url: str, api_token: str, preamble: bytes, f, file_size: int,
+                       timeout: float = 30) -> _SendfileResponse:
+        """POST a multipart upload over plain HTTP, sending the file body with socket.sendfile"""
+        epilogue = self._multipart_epilogue
+        url = urlsplit(upload_url)
+        path = url.path + (f'?{url.query}' if url.query else '')
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=timeout)
+        try:
+            conn.putrequest('POST', path)
+            conn.putheader('Authorization', f'Bearer {api_token}')
+            conn.putheader('Content-Type', self._multipart_content_type)
+            conn.putheader('Content-Length', str(len(preamble) + file_size + len(epilogue)))
+            conn.endheaders()
+            conn.send(preamble)
+            conn.sock.sendfile(f)
+            conn.send(epilogue)
+            response = conn.getresponse()
+            return _SendfileResponse(response.status, response.read().decode('utf-8', errors='replace'),
+                                     response.headers)
+        # Map socket errors onto requests exceptions so the caller's error handling applies
+        except socket.timeout as e:
+            raise requests.exceptions.Timeout(str(e))
+        except (OSError, http.client.HTTPException) as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _remote_file_id(response):
+        """Extract the uploaded file's ID from a 201 response, if the server returned one"""
+        try:
+            entry = json.loads(response.text).get('fileEntry') or {}
+            return entry.get('id')
+        except (ValueError, AttributeError):
+            return None
+
     def _monitor_network_recovery(self, base_url, api_token, callbacks):
         """Monitor for network recovery and auto-retry uploads"""
         retry_interval = 5  # seconds between retry attempts
@@ -336,7 +975,7 @@ class FileUploader:
 
         recovery_url = f"{base_url}/drive/file-entries"  # Use an API endpoint for checking
 
-        while attempt < max_retries and hasattr(self, 'network_issues_detected') and self.network_issues_detected:
+        while attempt < max_retries and self.network_issues_detected:
             time.sleep(retry_interval)
 
             # Skip if we're paused or stopped
@@ -345,18 +984,19 @@ class FileUploader:
 
             # Try to call an API endpoint
             try:
+                # Go through the upload session so a recovered connection is already pooled for the retries
                 headers = {'Authorization': f'Bearer {api_token}'}
-                response = requests.get(recovery_url, headers=headers, timeout=3)
+                response = self.session.get(recovery_url, headers=headers, timeout=3)
 
                 if response.status_code == 200:
-                    print("Network connection recovered!")
+                    logger.info("Network connection recovered!")
 
                     # Trigger callback if registered
-                    if hasattr(self, 'network_recovery_callback') and self.network_recovery_callback:
+                    if self.network_recovery_callback:
                         self.network_recovery_callback()
 
                     # Auto-retry failed uploads
-                    if hasattr(self, 'failed_uploads_details') and self.failed_uploads_details:
+                    if self.failed_uploads_details:
                         self._auto_retry_failed_uploads(callbacks)
 
                     # Reset network issues flag
@@ -367,11 +1007,14 @@ class FileUploader:
                 # Still having network issues
                 attempt += 1
 
-        self.network_monitor_active = False
+        # Allow a later network error to start monitoring again
+        with self.lock:
+            self.network_issues_detected = False
+            self.network_monitor_active = False
 
     def _auto_retry_failed_uploads(self, callbacks):
         """Automatically retry failed uploads after network recovery"""
-        if not hasattr(self, 'failed_uploads_details') or not self.failed_uploads_details:
+        if not self.failed_uploads_details:
             return
 
         # Get unique file paths from failed uploads, most recent first
@@ -389,16 +1032,18 @@ class FileUploader:
             if callbacks.get('on_notice') and len(unique_failures) > 0:
                 callbacks['on_notice'](f"Network connection restored! Auto-retrying {len(unique_failures)} failed uploads...")
 
-            # Queue up the retries
-            for failure in unique_failures:
-                # Remove this item from our failed uploads list
-                if failure in self.failed_uploads_details:
-                    self.failed_uploads_details.remove(failure)
+            # Remove the retried items from our failed uploads list in one pass
+            retried = {id(failure) for failure in unique_failures}
+            remaining = [failure for failure in self.failed_uploads_details if id(failure) not in retried]
+            self.failed_uploads_details.clear()
+            self.failed_uploads_details.extend(remaining)
 
-                # Make sure upload workers are running
-                if not self.upload_threads or not any(t.is_alive() for t in self.upload_threads):
-                    self.start_upload_workers()
+            # Make sure upload workers are running
+            if not self.active_threads():
+                self.start_upload_workers()
 
+            # Queue up the retries
+            for failure in unique_failures:
                 # Re-queue the upload
                 self.queue_upload(
                     failure['file_path'], 
@@ -417,218 +1062,133 @@ class FileUploader:
 
         # Normalize paths to handle different path formats
         file_path = os.path.normpath(file_path)
-        base_path = os.path.normpath(base_path)
 
-        # Ensure base_path ends with separator for proper relative path calculation
-        if not base_path.endswith(os.sep):
-            base_path += os.sep
+        # The base path is shared by a whole folder upload, so normalize it only once
+        normalized_base = self._normalized_base_paths.get(base_path)
+        if normalized_base is None:
+            normalized_base = os.path.normpath(base_path)
+            # Ensure base_path ends with separator for proper relative path calculation
+            if not normalized_base.endswith(os.sep):
+                normalized_base += os.sep
+            self._normalized_base_paths[base_path] = normalized_base
+        base_path = normalized_base
 
         # Check if file_path actually starts with base_path
-        if file_path.startswith(base_path):
-            # Get the directory portion of the file path, relative to the base path
-            file_dir = os.path.dirname(file_path)
-            rel_dir = os.path.relpath(file_dir, base_path)
-
-            # Convert to forward slashes for API consistency
-            rel_dir = rel_dir.replace('\\', '/')
-
-            # Handle root directory case
-            if rel_dir == '.' or not rel_dir:
-                return ""
+        if not file_path.startswith(base_path):
+            return ""
 
-            # Prevent duplicate folder nesting by checking if rel_dir contains parent folder name
-            parts = rel_dir.split('/')
-            if len(parts) > 1 and parts[0] == parts[1]:
-                # Remove the duplicate folder reference
-                parts.pop(0)
-                rel_dir = '/'.join(parts)
+        # Directory portion of the path below base_path, with forward slashes for API consistency
+        rel_file = file_path[len(base_path):]
+        sep_index = rel_file.rfind(os.sep)
+        if sep_index < 0:
+            return ""  # File sits directly in the root directory
+        rel_dir = rel_file[:sep_index].replace('\\', '/')
 
-            return rel_dir
+        # Prevent duplicate folder nesting when the first two components repeat
+        if '/' in rel_dir:
+            first, _, rest = rel_dir.partition('/')
+            if rest.split('/', 1)[0] == first:
+                rel_dir = rest
 
-        return ""
+        return rel_dir
 
     def queue_upload(self, file_path: str, target_folder_id: int, base_url: str = None, api_token: str = None, 
-                    callbacks: Dict = None, base_path: str = None):
-        """Add a file to the upload queue"""
+                    callbacks: Dict = None, base_path: str = None, file_stat: os.stat_result = None):
+        """Add a file to the upload queue. Pass file_stat if the caller already has it (e.g. from os.scandir)"""
         # If base_url and api_token are None, this is likely a retry using the latest values
-        # Use the latest values stored during normal uploads
-        if base_url is None and hasattr(self, 'latest_base_url'):
-            base_url = self.latest_base_url
-        if api_token is None and hasattr(self, 'latest_api_token'):
-            api_token = self.latest_api_token
-        if callbacks is None and hasattr(self, 'latest_callbacks'):
-            callbacks = self.latest_callbacks
-
-        # Store these for future retries
-        if base_url is not None:
-            self.latest_base_url = base_url
-        if api_token is not None:
-            self.latest_api_token = api_token
-        if callbacks is not None:
-            self.latest_callbacks = callbacks
+        context = self._upload_context
+        if context is not None:
+            if base_url is None:
+                base_url = context.base_url
+            if api_token is None:
+                api_token = context.api_token
+            if callbacks is None:
+                callbacks = context.callbacks
+
+        # Files queued with the same settings share one context object
+        if (context is None or context.base_url != base_url or context.api_token != api_token
+                or context.callbacks is not callbacks or context.base_path != base_path):
+            context = self._upload_context = _UploadContext(base_url, api_token, callbacks, base_path)
+
+        # Stat once here unless the caller already did - the result is also passed to the worker
+        if file_stat is None:
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                pass  # Ignore errors here; the worker will report them
+
+        # Skip files that were already uploaded to this folder and haven't changed since
+        if file_stat is not None and self.upload_cache.is_uploaded(base_url, target_folder_id, file_path, file_stat):
+            self._report_skipped(file_path, callbacks)
+            return
 
         # Update total size
-        try:
-            with self.lock:
-                self.total_size += os.path.getsize(file_path)
-        except OSError:
-            pass  # Ignore errors in size calculation
+        if file_stat is not None:
+            self._total_size.add(file_stat.st_size)
 
         # Try to add to queue with retries
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                self.upload_queue.put((file_path, target_folder_id, base_url, api_token, callbacks, base_path))
+                self.upload_queue.put((file_path, target_folder_id, context, file_stat))
                 return
             except Exception as e:
                 if attempt < max_retries - 1:
-                    print(f"Failed to queue upload, retrying ({attempt+1}/{max_retries}): {str(e)}")
+                    logger.warning("Failed to queue upload, retrying (%s/%s): %s", attempt + 1, max_retries, e)
                     time.sleep(0.5)
                 else:
-                    print(f"Failed to queue upload after {max_retries} attempts: {str(e)}")
+                    logger.error("Failed to queue upload after %s attempts: %s", max_retries, e)
                     if callbacks and 'on_error' in callbacks:
                         callbacks['on_error'](f"Failed to queue {os.path.basename(file_path)}: {str(e)}")
 
     def pause(self):
         """Pause all uploads"""
         # First set the pause flag to signal all threads
-        self.pause_flag.set()
-        print("Upload paused - flag set")
+        self._state.set(PAUSED, only_from=(RUNNING, PAUSED))
+        logger.info("Upload paused - flag set")
 
-        # Track active threads for pause completion detection
-        self.active_threads_at_pause = [t for t in self.upload_threads if t.is_alive()]
-        self.pause_tracking_active = True
-        self.pause_start_time = time.time()
-
-        # Additional logging for debugging
-        print(f"Pause flag status: {self.pause_flag.is_set()}")
-        print(f"Active upload threads: {len(self.active_threads_at_pause)}")
+        # Callers wait for in-flight uploads with wait_for_pause()
+        in_progress = sum(1 for t in self.active_threads() if getattr(t, 'current_file', None))
+        logger.debug("Pause flag status: %s", self.pause_flag.is_set())
 
         # Log information about the in-progress uploads
-        if self.active_threads_at_pause:
-            print(f"Note: {len(self.active_threads_at_pause)} uploads currently in progress may complete before pausing takes effect")
-            print("This is normal behavior as we cannot safely interrupt in-progress network operations")
-
-            # Start a thread to monitor when all in-progress uploads complete
-            threading.Thread(target=self._monitor_pause_completion, daemon=True).start()
-
-        # Create a session with a very short timeout to effectively prevent new requests
-        # This helps immediately interrupt any new requests that might get started
-        try:
-            for session in requests.sessions.Session.__subclasses__():
-                if hasattr(session, 'request'):
-                    # Store original request method for later restoration
-                    if not hasattr(session, '_old_request'):
-                        session._old_request = session.request
-                    session.request = lambda *args, **kwargs: None
-
-            # Force immediate timeout on existing sessions
-            requests.adapters.DEFAULT_RETRIES = 0
-            requests.adapters.DEFAULT_TIMEOUT = 0.1
-        except Exception as e:
-            print(f"Error while trying to pause network operations: {str(e)}")
-            # Continue anyway as the pause flag should still work
-
-    def _monitor_pause_completion(self):
-        """Monitor when all in-progress uploads at pause time complete"""
-        if not hasattr(self, 'active_threads_at_pause'):
-            return
-
-        # Wait for all active uploads to complete
-        max_wait_time = 300  # 5 minutes maximum wait time
-        check_interval = 0.5  # Check every half second
-
-        # Create a snapshot of the total_uploaded count at pause time
-        uploads_at_pause = self.total_uploaded
-
-        # Track how many uploads were processed during pause
-        uploads_during_pause = 0
-
-        while self.pause_flag.is_set() and self.pause_tracking_active:
-            # Check if all threads are done processing their current task
-            all_busy = False
-            for thread in self.active_threads_at_pause[:]:  # Use slice to avoid modifying during iteration
-                if not thread.is_alive():
-                    # Thread has died/exited
-                    self.active_threads_at_pause.remove(thread)
-                else:
-                    # Thread is alive, but might be waiting for next task
-                    all_busy = True
-
-            # Also check if we've processed new uploads since pausing
-            if self.total_uploaded > uploads_at_pause:
-                uploads_during_pause = self.total_uploaded - uploads_at_pause
-                uploads_at_pause = self.total_uploaded
-                all_busy = True
-
-            # If no threads are busy or if timeout reached, break
-            if not all_busy or time.time() - self.pause_start_time > max_wait_time:
-                if self.pause_tracking_active and self.pause_flag.is_set():
-                    completion_message = f"All in-progress uploads have completed. Sync is fully paused."
-                    if uploads_during_pause > 0:
-                        completion_message = f"{uploads_during_pause} files completed during pause transition. Sync is now fully paused."
-
-                    print(completion_message)
-
-                    # Notify any callbacks that pause is complete
-                    if hasattr(self, 'pause_complete_callback') and self.pause_complete_callback:
-                        self.pause_complete_callback(uploads_during_pause)
-
-                    self.pause_tracking_active = False
-                break
-
-            time.sleep(check_interval)
+        if in_progress:
+            logger.info("Note: %s uploads currently in progress may complete before pausing takes effect", in_progress)
+            logger.info("This is normal behavior as we cannot safely interrupt in-progress network operations")
 
     def resume(self):
         """Resume all uploads"""
-        # Reset request adapter settings to normal
-        requests.adapters.DEFAULT_RETRIES = 3
-        requests.adapters.DEFAULT_TIMEOUT = 30
-
-        # Reset session behaviors that were modified during pause
-        for session in requests.sessions.Session.__subclasses__():
-            if hasattr(session, '_old_request'):
-                session.request = session._old_request
-
-        # Clear pause flag regardless of its state to ensure uploads can proceed
+        # Leave the paused state so waiting workers wake up and continue
         self.pause_flag.clear()
-        print("Upload resumed - flag cleared")
-        print(f"Pause flag status: {self.pause_flag.is_set()}")
+        logger.info("Upload resumed - flag cleared")
+        logger.debug("Pause flag status: %s", self.pause_flag.is_set())
 
         # Check for active threads
-        active_threads = [t for t in self.upload_threads if t.is_alive()]
-        print(f"Active upload threads: {len(active_threads)}")
+        active_threads = self.active_threads()
+        logger.debug("Active upload threads: %s", len(active_threads))
 
         # If no active threads, restart them
         if not active_threads:
-            print("No active upload threads found. Restarting workers...")
-            # Clean up any dead threads first
-            self.upload_threads = [t for t in self.upload_threads if t.is_alive()]
+            logger.info("No active upload threads found. Restarting workers...")
             self.start_upload_workers()
         else:
-            print(f"Resume: Continuing with {len(active_threads)} active threads")
+            logger.info("Resume: Continuing with %s active threads", len(active_threads))
 
             # Send a notification to wake up threads that might be stuck
-            for thread in self.upload_threads:
-                if thread.is_alive():
-                    print(f"Signaling thread {thread.name} to continue")
+            for thread in active_threads:
+                logger.debug("Signaling thread %s to continue", thread.name)
 
     def stop(self):
         """Stop all uploads gracefully"""
-        print("Stopping uploads gracefully...")
+        logger.info("Stopping uploads gracefully...")
 
-        # First clear any pause flag to ensure threads can continue and then exit
+        # Go straight from paused to stopped so waiting workers wake up and exit
         if self.pause_flag.is_set():
-            self.pause_flag.clear()
-            print("Cleared pause flag to allow threads to exit properly")
+            logger.debug("Cleared pause flag to allow threads to exit properly")
 
-        # Set the stop flag to prevent new work
+        # Set the stop flag to prevent new work and wake any paused workers
         self.stop_flag.set()
-
-        # Force immediate timeout of any active requests to avoid hanging
-        # Save old timeout for potential reset later
-        old_timeout = getattr(requests.adapters, 'DEFAULT_TIMEOUT', 30)
-        requests.adapters.DEFAULT_TIMEOUT = 0.5
+        self._drop_pending_retries()
 
         # Clear the queue to prevent blocked join
         remaining_items = []
@@ -640,37 +1200,51 @@ class FileUploader:
                         remaining_items.append(item)
                     self.upload_queue.task_done()
                 except Exception as e:
-                    print(f"Error clearing queue: {str(e)}")
+                    logger.warning("Error clearing queue: %s", e)
                     break
         except Exception as e:
-            print(f"Error accessing queue: {str(e)}")
+            logger.warning("Error accessing queue: %s", e)
 
         # Add termination signals to ensure threads exit
         for _ in range(len(self.upload_threads)):
             try:
                 self.upload_queue.put(None, block=False)
             except Exception as e:
-                print(f"Error adding termination signal: {str(e)}")
+                logger.warning("Error adding termination signal: %s", e)
                 pass
 
-        # Join threads with timeout to avoid hanging
+        # Join threads against one shared deadline so shutdown takes at most STOP_JOIN_TIMEOUT overall
         active_threads = list(self.upload_threads)  # Make a copy to avoid modification issues
+        deadline = time.monotonic() + STOP_JOIN_TIMEOUT
         for thread in active_threads:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
             if thread.is_alive():
                 try:
-                    print(f"Waiting for thread {thread.name} to terminate...")
-                    thread.join(timeout=2.0)  # Longer timeout for proper cleanup
+                    logger.debug("Waiting for thread %s to terminate...", thread.name)
+                    thread.join(timeout=remaining)
                 except Exception as e:
-                    print(f"Error joining thread: {str(e)}")
+                    logger.warning("Error joining thread: %s", e)
+
+        still_running = [thread.name for thread in active_threads if thread.is_alive()]
+        if still_running:
+            logger.warning("Upload threads still running after stop: %s", ", ".join(still_running))
 
         # Clear thread list and reset counters
-        self.upload_threads.clear()
+        self.upload_threads = []
         self.total_uploaded = 0
         self.total_size = 0
-        self.current_speed = 0
+        self._uploaded_bytes.reset()
+        self._reset_speed()
 
-        # Restore defaults for potential future use
-        requests.adapters.DEFAULT_TIMEOUT = old_timeout
+        # Close pooled connections and start with a fresh session if workers are restarted
+        try:
+            self.session.close()
+        except Exception as e:
+            logger.warning("Error closing upload session: %s", e)
+        self.session = self._create_session()
+        self._session_token = None
 
-        print("Upload stopped successfully")
+        logger.info("Upload stopped successfully")
         
@@ -1,85 +1,256 @@
 import os
+import json
+import logging
 import requests
 import threading
 import time
-from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from operator import itemgetter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Tuple, Optional
 
+logger = logging.getLogger(__name__)
+
+try:
+    # orjson parses large folder listings several times faster; it is optional
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Folders looked up or created concurrently while building the tree
+FOLDER_WORKERS = 8
+POOL_MAXSIZE = 16
+# How long a cached folder listing is trusted before it is fetched again
+LISTING_TTL = 30
+# Parent IDs sent in one batched folder listing request
+FOLDER_BATCH_SIZE = 50
+# The API rejects shorter folder names, so they are padded with underscores
+MIN_FOLDER_NAME_LENGTH = 3
+# How often a request rate limited with 429 is retried, and the wait used when no Retry-After is sent
+MAX_THROTTLE_RETRIES = 5
+DEFAULT_RETRY_AFTER = 1.0
+
+def _iter_subdirs(root: str):
+    """Yield (relative path, parent relative path, name, depth) for every directory below root, with '/' separators"""
+    stack = [(root, "", 0)]
+    while stack:
+        path, rel, depth = stack.pop()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    # Symlinked directories aren't descended into, matching os.walk
+                    if entry.is_dir(follow_symlinks=False):
+                        sub = f"{rel}/{entry.name}" if rel else entry.name
+                        yield sub, rel, entry.name, depth + 1
+                        stack.append((entry.path, sub, depth + 1))
+        except OSError:
+            continue  # Unreadable directories are skipped, as os.walk does
+
 class FolderManager:
     def __init__(self, api_token: str, base_url: str):
         self.api_token = api_token
         self.base_url = base_url
         self.folder_cache = {}
         self.lock = threading.Lock()
+        self.session = self._create_session()
+        self._listing_cache = {}  # parent ID -> (fetch time, {folder name: folder ID})
+        self._listing_fetches = {}  # parent ID -> lock held while fetching that listing
+        self._path_cache = {}  # folder ID -> path, folders aren't moved or renamed by this app
+        self._throttled_until = 0.0  # monotonic time before which no request is sent after a 429
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Tuple[bool, dict]:
-        """Make an API request with proper error handling"""
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        headers = {
+    def _create_session(self) -> requests.Session:
+        """Create a pooled session so connections to the API are kept alive between calls"""
+        session = requests.Session()
+        # Set once here; requests merges these with any per-call headers itself
+        session.headers.update({
             "Authorization": f"Bearer {self.api_token}",
             "Content-Type": "application/json",
             "Accept": "application/json"  # Explicitly request JSON response
-        }
-        kwargs['headers'] = {**kwargs.get('headers', {}), **headers}
+        })
+        # One pooled connection per concurrent folder worker, plus headroom for other callers
+        adapter = HTTPAdapter(
+            pool_connections=POOL_MAXSIZE,
+            pool_maxsize=max(POOL_MAXSIZE, FOLDER_WORKERS),
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _wait_for_throttle(self):
+        """Hold a request back while the server has asked us to slow down"""
+        delay = self._throttled_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _throttle(self, response: requests.Response, attempt: int):
+        """Pause all requests after a 429, honouring Retry-After when the server sends one"""
+        delay = DEFAULT_RETRY_AFTER * 2 ** attempt
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                delay = max(float(retry_after), 0.0)
+            except ValueError:
+                pass  # HTTP-date form; keep the exponential default
+        logger.warning("Rate limited by server, backing off for %.1fs", delay)
+        with self.lock:
+            self._throttled_until = max(self._throttled_until, time.monotonic() + delay)
+
+    def _make_request(self, method: str, endpoint: str, **kwargs) -> Tuple[bool, dict]:
+        """Make an API request with proper error handling"""
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
 
         try:
-            response = requests.request(method, url, **kwargs)
-            print(f"API Response ({method} {endpoint}): {response.status_code}")
+            for attempt in range(MAX_THROTTLE_RETRIES + 1):
+                self._wait_for_throttle()
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code != 429 or attempt == MAX_THROTTLE_RETRIES:
+                    break
+                self._throttle(response, attempt)
+            logger.debug("API Response (%s %s): %s", method, endpoint, response.status_code)
 
             # Check if response is HTML instead of JSON
             content_type = response.headers.get('content-type', '')
             if 'html' in content_type.lower():
-                print(f"Received HTML response instead of JSON")
+                logger.warning("Received HTML response instead of JSON")
                 return False, {}
 
             if response.content:
                 try:
-                    data = response.json()
+                    # Parse the raw bytes directly, skipping requests' text decoding and charset detection
+                    data = _json_loads(response.content)
                     # Print response data for debugging
                     if response.status_code >= 400:
-                        print(f"Error response: {data}")
+                        logger.warning("Error response: %s", data)
                     return response.status_code < 400, data
                 except ValueError as e:
-                    print(f"Failed to parse JSON response: {e}")
-                    print(f"Response content: {response.content[:200]}")
+                    logger.warning("Failed to parse JSON response: %s", e)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Response content: %r", response.content[:200])
                     return False, {}
             return True, {}
 
         except requests.exceptions.RequestException as e:
-            print(f"API request failed ({method} {endpoint}): {str(e)}")
+            logger.error("API request failed (%s %s): %s", method, endpoint, e)
             return False, {}
         except ValueError as e:
-            print(f"Failed to parse response ({method} {endpoint}): {str(e)}")
+            logger.error("Failed to parse response (%s %s): %s", method, endpoint, e)
             return False, {}
 
     def list_folders(self, parent_id: Optional[int] = None) -> Dict[str, int]:
-        """List all folders, optionally under a specific parent"""
-        params = {"type": "folder"}
-        if parent_id is not None:
-            params["parentIds"] = [str(parent_id)]
+        """List all folders, optionally under a specific parent. The result is shared with the cache; don't modify it"""
+        with self.lock:
+            cached = self._cached_listing(parent_id)
+            if cached is not None:
+                return cached
+            fetch_lock = self._listing_fetches.setdefault(parent_id, threading.Lock())
 
-        success, data = self._make_request('GET', '/drive/file-entries', params=params)
-        if not success:
-            return {}
+        # Sibling folders being created concurrently share one GET of their parent's listing
+        with fetch_lock:
+            with self.lock:
+                cached = self._cached_listing(parent_id)
+            if cached is not None:
+                return cached
+
+            params = {"type": "folder"}
+            if parent_id is not None:
+                params["parentIds"] = [str(parent_id)]
+
+            folders = self._list_entries(params)
+            if folders is None:
+                return {}
+
+            listing = {folder["name"]: folder["id"] for folder in folders if "name" in folder and "id" in folder}
+            with self.lock:
+                self._listing_cache[parent_id] = (time.monotonic(), listing)
+            return listing
+
+    def _cached_listing(self, parent_id: Optional[int]) -> Optional[Dict[str, int]]:
+        """A parent's cached listing if it is younger than LISTING_TTL; call with self.lock held"""
+        cached = self._listing_cache.get(parent_id)
+        if cached is not None and time.monotonic() - cached[0] < LISTING_TTL:
+            return cached[1]
+        return None
+
+    def _list_entries(self, params: dict) -> Optional[List[dict]]:
+        """GET file entries, following pagination; None if any page fails"""
+        entries = []
+        page = 1
+        while True:
+            success, data = self._make_request('GET', '/drive/file-entries', params={**params, "page": page})
+            if not success:
+                return None
 
-        folders = []
-        if isinstance(data, dict) and 'data' in data:
-            folders = data['data']
-        elif isinstance(data, list):
-            folders = data
+            if isinstance(data, dict) and 'data' in data:
+                entries.extend(data['data'])
+            elif isinstance(data, list):
+                entries.extend(data)
 
-        return {folder["name"]: folder["id"] for folder in folders if "name" in folder and "id" in folder}
+            if not isinstance(data, dict) or page >= (data.get('last_page') or 1):
+                return entries
+            page += 1
+
+    def _prefetch_listings(self, parent_ids: List[int]):
+        """Cache the folder listings of many parents using one batched request per FOLDER_BATCH_SIZE parents"""
+        with self.lock:
+            missing = list(dict.fromkeys(pid for pid in parent_ids if self._cached_listing(pid) is None))
+
+        for start in range(0, len(missing), FOLDER_BATCH_SIZE):
+            batch = {str(pid): pid for pid in missing[start:start + FOLDER_BATCH_SIZE]}
+            folders = self._list_entries({"type": "folder", "parentIds": list(batch)})
+            if folders is None:
+                return  # Leave these to the per-parent listing in list_folders
+
+            # Only parents that show up in the response are cached. The server may not return
+            # children for every requested parent, so the rest are left to list_folders.
+            listings = {}
+            for folder in folders:
+                if "name" not in folder or "id" not in folder:
+                    continue
+                parent_id = batch.get(str(folder.get("parent_id")))
+                if parent_id is None:
+                    return  # Can't tell which parent this belongs to
+                listings.setdefault(parent_id, {})[folder["name"]] = folder["id"]
+
+            fetched_at = time.monotonic()
+            with self.lock:
+                for parent_id, listing in listings.items():
+                    if self._cached_listing(parent_id) is None:
+                        self._listing_cache[parent_id] = (fetched_at, listing)
+
+    def _prefetch_tree(self, children: Dict[str, List[Tuple[str, str]]], cloud_parent_id: int):
+        """Warm the listing cache for the part of the tree that already exists, one batched GET per depth"""
+        level = {"": cloud_parent_id}
+        while level:
+            self._prefetch_listings(list(level.values()))
+            next_level = {}
+            with self.lock:
+                for parent_path, parent_id in level.items():
+                    listing = self._cached_listing(parent_id)
+                    if listing is None:
+                        continue
+                    for child_path, name in children.get(parent_path, ()):
+                        folder_id = listing.get(name)
+                        if folder_id:
+                            next_level[child_path] = folder_id
+            level = next_level
+
+    def invalidate_listing(self, parent_id: Optional[int] = None):
+        """Drop the cached listing of a parent so the next list_folders call re-fetches it"""
+        with self.lock:
+            self._listing_cache.pop(parent_id, None)
 
     def create_folder(self, name: str, parent_id: Optional[int] = None) -> Optional[int]:
         """Create a new folder and return its ID"""
         # Validate folder name - API requires at least 3 characters
-        original_name = name
-        if len(name) < 3:
-            print(f"Warning: Folder name '{name}' is less than 3 characters long. Adding underscores to meet 3-character requirement.")
-            # Add underscores until name is at least 3 characters
-            while len(name) < 3:
-                name += "_"
-            print(f"Adjusted folder name: '{name}'")
+        # (ensure_folder_structure pads names up front, so this only fires for other callers)
+        if len(name) < MIN_FOLDER_NAME_LENGTH:
+            logger.warning("Folder name '%s' is less than 3 characters long. Adding underscores to meet 3-character requirement.", name)
+            name = name.ljust(MIN_FOLDER_NAME_LENGTH, "_")
+            logger.debug("Adjusted folder name: '%s'", name)
         
         payload = {
             "name": name,
@@ -91,7 +262,7 @@ class FolderManager:
 
         success, data = self._make_request('POST', '/folders', json=payload)
         if not success:
-            print(f"Failed to create folder: {name}. Response data: {data}")
+            logger.error("Failed to create folder: %s. Response data: %s", name, data)
             return None
 
         if isinstance(data, dict):
@@ -99,6 +270,7 @@ class FolderManager:
             if folder_id:
                 # Record folder ID in cache
                 self.folder_cache[name] = folder_id
+                self._add_to_listing(parent_id, name, folder_id)
                 return folder_id
 
             # Alternative response structure
@@ -108,84 +280,106 @@ class FolderManager:
                 if folder_id:
                     # Record folder ID in cache
                     self.folder_cache[name] = folder_id
+                    self._add_to_listing(parent_id, name, folder_id)
                 return folder_id
 
-        print(f"Unexpected response format for folder creation: {data}")
+        logger.warning("Unexpected response format for folder creation: %s", data)
         return None
 
+    def _add_to_listing(self, parent_id: Optional[int], name: str, folder_id: int):
+        """Add a newly created folder to its parent's cached listing, if that listing was fetched"""
+        with self.lock:
+            listing = self._cached_listing(parent_id)
+            if listing is not None:
+                # Replace the dict rather than update it: list_folders hands it to callers who may be iterating it
+                fetched_at = self._listing_cache[parent_id][0]
+                self._listing_cache[parent_id] = (fetched_at, {**listing, name: folder_id})
+            # A folder that was just created has no subfolders yet
+            self._listing_cache.setdefault(folder_id, (time.monotonic(), {}))
+
+    def _ensure_one(self, clean_path: str, parent_path: str, folder_name: str, parent_id: int) -> Optional[int]:
+        """Find or create a single folder under an already resolved parent"""
+        logger.debug("Creating folder '%s' under parent path '%s' (ID: %s)", folder_name, parent_path, parent_id)
+
+        # Check if folder exists under the correct parent (the listing is cached per parent)
+        folder_id = self.list_folders(parent_id).get(folder_name)
+        if folder_id:
+            logger.debug("Found existing folder: %s -> %s", clean_path, folder_id)
+        else:
+            # Create folder under the correct parent
+            folder_id = self.create_folder(folder_name, parent_id)
+            if folder_id:
+                logger.info("Created new folder: %s -> %s", clean_path, folder_id)
+            else:
+                logger.warning("Create folder API call returned None for %s", folder_name)
+
+        return folder_id
+
     def ensure_folder_structure(self, local_path: str, cloud_parent_id: int) -> Dict[str, int]:
         """Create necessary folder structure in cloud storage"""
         folder_map = {"": cloud_parent_id}
         local_path = os.path.normpath(local_path)
 
-        # Get all subdirectories first
-        subdirs = []
-        for root, dirs, _ in os.walk(local_path):
-            rel_path = os.path.relpath(root, local_path)
-            if rel_path == ".":
-                rel_path = ""
-            subdirs.append(rel_path)
-
-        # Sort by path depth to ensure parent folders are created first
-        subdirs.sort(key=lambda p: len(Path(p).parts))
+        # Get all subdirectories first, sorted by depth so the log reads top-down
+        subdirs = sorted(_iter_subdirs(local_path), key=itemgetter(3))
 
         # Log the folder structure that will be created
-        print(f"Creating folder structure with {len(subdirs)} directories")
-        for subdir in subdirs:
-            if subdir:  # Skip empty path (root)
-                print(f"  - {subdir}")
-
-        # Create folder structure
-        for rel_path in subdirs:
-            if not rel_path:  # Skip empty path (root)
-                continue
-
-            # Convert Windows path to proper format
-            clean_path = rel_path.replace("\\", "/")
-            parent_path = os.path.dirname(clean_path).replace("\\", "/")
-            folder_name = os.path.basename(clean_path)
-
-            # Get parent folder ID from our map
-            parent_id = folder_map.get(parent_path)
-
-            if parent_id is None:
-                print(f"Error: Parent path '{parent_path}' not found in folder map")
-                # Skip this folder creation since parent doesn't exist
-                print(f"Skipping folder creation: {clean_path}")
-                continue
-
-            print(f"Creating folder '{folder_name}' under parent path '{parent_path}' (ID: {parent_id})")
-
-            # Check if folder exists under the correct parent
-            existing_folders = self.list_folders(parent_id)
-            
-            # First check exact name match
-            if folder_name in existing_folders:
-                folder_id = existing_folders[folder_name]
-                print(f"Found existing folder: {clean_path} -> {folder_id}")
-            else:
-                # Create folder under the correct parent
-                folder_id = self.create_folder(folder_name, parent_id)
-                if folder_id:
-                    print(f"Created new folder: {clean_path} -> {folder_id}")
-                else:
-                    print(f"Create folder API call returned None for {folder_name}")
-                time.sleep(0.5)  # Rate limiting
+        logger.info("Creating folder structure with %d directories", len(subdirs))
+        if logger.isEnabledFor(logging.DEBUG):
+            for subdir, _, _, _ in subdirs:
+                logger.debug("  - %s", subdir)
 
-            if folder_id:
-                # Use the original path in our folder map
-                folder_map[clean_path] = folder_id
-                print(f"Mapped folder path '{clean_path}' to ID {folder_id}")
-            else:
-                print(f"Failed to create/map folder: {clean_path}")
+        # Group by parent; a folder is submitted as soon as its parent has an ID,
+        # so one slow sibling doesn't hold back unrelated subtrees
+        children = defaultdict(list)
+        # Names are padded here once, so lookups match the name the folder was created under
+        for rel_path, parent_rel, name, _ in subdirs:
+            children[parent_rel].append((rel_path, name.ljust(MIN_FOLDER_NAME_LENGTH, "_")))
+
+        # Existing folders are then found in the cache, so only missing ones cost a request
+        self._prefetch_tree(children, cloud_parent_id)
+
+        with ThreadPoolExecutor(max_workers=FOLDER_WORKERS) as executor:
+            pending = {}
+
+            def submit_children(parent_path):
+                parent_id = folder_map[parent_path]
+                for child_path, name in children.pop(parent_path, ()):
+                    pending[executor.submit(self._ensure_one, child_path, parent_path, name, parent_id)] = child_path
+
+            submit_children("")
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    clean_path = pending.pop(future)
+                    folder_id = future.result()
+                    if folder_id:
+                        # Use the original path in our folder map
+                        folder_map[clean_path] = folder_id
+                        logger.debug("Mapped folder path '%s' to ID %s", clean_path, folder_id)
+                        submit_children(clean_path)
+                    else:
+                        logger.error("Failed to create/map folder: %s", clean_path)
+
+        # Anything left over sits below a folder that couldn't be created
+        for parent_path, child_paths in children.items():
+            for clean_path, _ in child_paths:
+                logger.error("Parent path '%s' not found in folder map, skipping folder creation: %s",
+                             parent_path, clean_path)
         
-        print(f"Final folder mapping: {folder_map}")
+        logger.debug("Final folder mapping: %s", folder_map)
         return folder_map
 
     def get_folder_path(self, folder_id: int) -> str:
         """Get the full path of a folder by its ID"""
+        cached = self._path_cache.get(folder_id)
+        if cached is not None:
+            return cached
+
         success, data = self._make_request('GET', f'/drive/file-entries/{folder_id}')
         if success and isinstance(data, dict):
-            return data.get("path", "")
+            path = data.get("path", "")
+            self._path_cache[folder_id] = path
+            return path
         return ""
         
@@ -3,25 +3,143 @@ import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import threading
 import os
+import sys
+import io
+import base64
+import queue
+import logging
+import logging.handlers
 from typing import Dict, List
 from pathlib import Path
 import time
+from functools import lru_cache
 
-from file_uploader import FileUploader
+from file_uploader import FileUploader, STOP_JOIN_TIMEOUT
 from folder_manager import FolderManager
 from ui_components import (
     ProgressFrame, LogFrame, ControlPanel, ThemeColors, ThemeManager,
     StylishButton, play_completion_animation
 )
 
+logger = logging.getLogger(__name__)
+
+# Simple folder icon as base64 (fallback if no icon file exists)
+FOLDER_ICON_PNG = "iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAOxAAADsQBlSsOGwAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAGxSURBVFiF7ZY9TsNAEIU/O05DCQeggOQSXICGM9BwAArOAAUFR6DhAJTmANScg46Ugo4iRZQo2R12KRKJn+BNQsErdtea9+bNz44NkZGR8U8QAPKhR8DMDlRV39z9/Lut2WxmZnZiZjYajV6MMRX+dswAqOvakVL3wPjLQlVVIyB3rhN5GzDGLMxsMRwOp8aYubruJdJKKU+zJRaRfdRam+9aVNVD4CnwWWi73cOu7UMZDAaJtLOxiLh4vLtPzOxta2L3uUjv+STCYDB4THw6nR4mJH+qqupiFwnDt6YbkfO6rueqijFmICJnwGWwLjc3m/SfLyxnAPf39y5wF46rqnoADmNXJBGWZTkXkRPgLPTLb8E/KsEeUJZlJSL3wOXfku8lAFAUxQKYARR7/j9kLwEi0gANQFEUs0TkF4jIuZk5AGPMvTGmSUgeJQCQpYjcBfFJVKeUIC9yo+q7dYfkyVBVH4FH4FFEDsIhJCJnZnYbCN3dL/7SgJnNu6nVXeADMEkk70nVP3G3eRdF8RCuyqIoFsG7JyJvwFsg8sF4PH5Jld9kZGRkZGRkZGRkZPwtH/uyTBfEhIGiAAAAAElFTkSuQmCC"
+
+# Progress is logged every this many files while the folder is scanned
+QUEUE_LOG_INTERVAL = 500
+
+# Minimum seconds between per-file "Uploading: ..." status bar updates
+STATUS_UPDATE_INTERVAL = 0.1
+
+# Blended animation colors kept in memory (a few fixed palettes x a few steps each)
+BLEND_CACHE_SIZE = 512
+
+# Color changes smaller than this (summed over R, G and B) are applied without animating
+MIN_ANIMATED_COLOR_DISTANCE = 8
+
+# Prefix of uploader error messages, followed by "<path>: <reason>"
+UPLOAD_ERROR_PREFIX = "Upload error for "
+
+# Delay before a replacement button is created, so the old one's deferred destroy has run
+BUTTON_SWAP_DELAY_MS = 50
+
+# Widget settings for each steady sync state; a speed of None leaves the speed and ETA text alone
+UI_STATES = {
+    "paused": {
+        "icon": "⏸", "color": ThemeColors.WARNING, "status_text": "Paused",
+        "progress_status": "PAUSED", "speed": "Paused", "eta": "Paused", "speed_icon": "⏸",
+        "flags": {"is_pausing": False, "is_paused": True},
+    },
+    "syncing": {
+        "icon": "●", "color": ThemeColors.SUCCESS, "status_text": "Uploading",
+        "progress_status": "SYNCING", "speed": None, "eta": None, "speed_icon": "↑",
+        "flags": {"is_paused": False, "is_pausing": False},
+    },
+    "stopped": {
+        "icon": "⏹", "color": ThemeColors.ERROR, "status_text": "Stopped",
+        "progress_status": "STOPPED", "speed": "Stopped", "eta": "Click START for new upload", "speed_icon": "⏹",
+        "flags": {"is_stopping": False, "is_stopped": True},
+    },
+}
+
+# Longest the UI waits for in-flight uploads before showing the paused state anyway
+PAUSE_SETTLE_TIMEOUT = 300
+
+def _parse_hex_color(color: str) -> tuple:
+    """Convert "#rrggbb" to an (r, g, b) tuple"""
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+# Theme colors parsed once, so blending and comparing them skips the hex parsing
+_THEME_RGB = {
+    color: _parse_hex_color(color) for color in vars(ThemeColors).values()
+    if isinstance(color, str) and len(color) == 7 and color.startswith('#')
+}
+
+def _hex_to_rgb(color: str) -> tuple:
+    """(r, g, b) for a "#rrggbb" color, using the pre-parsed theme colors when possible"""
+    rgb = _THEME_RGB.get(color)
+    return rgb if rgb is not None else _parse_hex_color(color)
+
+@lru_cache(maxsize=BLEND_CACHE_SIZE)
+def _blend_hex_colors(color1: str, color2: str, blend_factor: float) -> str:
+    """Blend two "#rrggbb" colors; animations reuse the same few colors and steps, so results are cached"""
+    try:
+        if not color1.startswith('#') or not color2.startswith('#'):
+            return ThemeColors.BG_PRIMARY
+
+        if len(color1) != 7 or len(color2) != 7:
+            return ThemeColors.BG_PRIMARY
+
+        # Convert hex to RGB
+        r1, g1, b1 = _hex_to_rgb(color1)
+        r2, g2, b2 = _hex_to_rgb(color2)
+
+        # Linear interpolation
+        r = int(r1 + (r2 - r1) * blend_factor)
+        g = int(g1 + (g2 - g1) * blend_factor)
+        b = int(b1 + (b2 - b1) * blend_factor)
+
+        # Convert back to hex
+        return f"#{r:02x}{g:02x}{b:02x}"
+    except Exception as e:
+        logger.warning("Error blending colors: %s", e)
+        return ThemeColors.BG_PRIMARY
+
+def _color_distance(color1, color2) -> int:
+    """Sum of the per-channel differences between two "#rrggbb" colors (large if either can't be parsed)"""
+    try:
+        return sum(abs(c1 - c2) for c1, c2 in zip(_hex_to_rgb(color1), _hex_to_rgb(color2)))
+    except (TypeError, ValueError):
+        return 3 * 255
+
+def setup_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """Route log records through a queue so upload workers never block on console output"""
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    # The listener thread does the actual (slow) writing to the console
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s %(threadName)s %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, console_handler)
+    listener.start()
+    return listener
+
 class FolderFortSync:
     def __init__(self):
         self.setup_window()
         self.uploader = FileUploader()
         self.folder_manager = None
         self.failed_uploads = []
+        self._failed_upload_set = set()  # Mirrors failed_uploads for constant-time duplicate checks
+        self._last_status_text = ""
+        self._status_last_update = 0.0
         self.is_paused = False    # Track pause state
         self.is_stopping = False  # Track stopping state
+        self._resume_check_ids = []  # Pending after() ids of post-resume checks
+        self._scan_finished = True  # False while _sync_process is still finding files to queue
 
         self.setup_ui()
         self.bind_callbacks()
@@ -105,35 +223,7 @@ class FolderFortSync:
 
         # Set window icon if platform supports it
         try:
-            # Different approach based on platform
-            import platform
-            if platform.system() == "Windows":
-                self.root.iconbitmap("icon.ico")
-            elif platform.system() == "Darwin":  # macOS
-                pass  # macOS uses the app bundle for icons
-            else:  # Linux and others
-                try:
-                    from PIL import Image, ImageTk
-                    import base64
-                    import io
-                except ImportError:
-                    # Skip icon setup if PIL is not available
-                    print("Note: Pillow not available, skipping icon setup")
-                    pass
-
-                # Simple folder icon as base64 (fallback if no icon file exists)
-                folder_icon = "iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAOxAAADsQBlSsOGwAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAGxSURBVFiF7ZY9TsNAEIU/O05DCQeggOQSXICGM9BwAArOAAUFR6DhAJTmANScg46Ugo4iRZQo2R12KRKJn+BNQsErdtea9+bNz44NkZGR8U8QAPKhR8DMDlRV39z9/Lut2WxmZnZiZjYajV6MMRX+dswAqOvakVL3wPjLQlVVIyB3rhN5GzDGLMxsMRwOp8aYubruJdJKKU+zJRaRfdRam+9aVNVD4CnwWWi73cOu7UMZDAaJtLOxiLh4vLtPzOxta2L3uUjv+STCYDB4THw6nR4mJH+qqupiFwnDt6YbkfO6rueqijFmICJnwGWwLjc3m/SfLyxnAPf39y5wF46rqnoADmNXJBGWZTkXkRPgLPTLb8E/KsEeUJZlJSL3wOXfku8lAFAUxQKYARR7/j9kLwEi0gANQFEUs0TkF4jIuZk5AGPMvTGmSUgeJQCQpYjcBfFJVKeUIC9yo+q7dYfkyVBVH4FH4FFEDsIhJCJnZnYbCN3dL/7SgJnNu6nVXeADMEkk70nVP3G3eRdF8RCuyqIoFsG7JyJvwFsg8sF4PH5Jld9kZGRkZGRkZGRkZPwtH/uyTBfEhIGiAAAAAElFTkSuQmCC"
-
-                try:
-                    # Try to load an actual icon file if it exists
-                    icon = Image.open("icon.png")
-                except:
-                    # Use the embedded base64 icon as fallback
-                    icon_data = base64.b64decode(folder_icon)
-                    icon = Image.open(io.BytesIO(icon_data))
-
-                icon_photo = ImageTk.PhotoImage(icon)
-                self.root.iconphoto(True, icon_photo)
+            self._set_window_icon()
         except Exception as e:
             # Fail silently if icon setting doesn't work
             print(f"Could not set window icon: {str(e)}")
@@ -142,6 +232,32 @@ class FolderFortSync:
         self.root.grid_rowconfigure(0, weight=1)
         self.root.grid_columnconfigure(0, weight=1)
 
+    def _set_window_icon(self):
+        """Set the window icon; sys.platform avoids platform.system(), which can spawn a process on Windows"""
+        if sys.platform == "win32":
+            self.root.iconbitmap("icon.ico")
+            return
+        if sys.platform == "darwin":
+            return  # macOS uses the app bundle for icons
+
+        # Linux and others - Pillow is only needed here, so it's imported lazily
+        try:
+            from PIL import Image, ImageTk
+        except ImportError:
+            # Skip icon setup if PIL is not available
+            print("Note: Pillow not available, skipping icon setup")
+            return
+
+        try:
+            # Try to load an actual icon file if it exists
+            icon = Image.open("icon.png")
+        except OSError:
+            # Use the embedded base64 icon as fallback
+            icon = Image.open(io.BytesIO(base64.b64decode(FOLDER_ICON_PNG)))
+
+        icon_photo = ImageTk.PhotoImage(icon)
+        self.root.iconphoto(True, icon_photo)
+
     def setup_ui(self):
         # Main container with improved padding balance
         self.main_frame = ctk.CTkFrame(
@@ -174,6 +290,7 @@ class FolderFortSync:
                 "stop": self.stop_sync,
                 "retry": self.retry_failed,
                 "refresh_folders": self.refresh_cloud_folders,
+                "clear_cache": self.clear_upload_cache,
                 "show_message": self.show_message
             }
         )
@@ -188,53 +305,42 @@ class FolderFortSync:
         self.log_frame.grid(row=1, column=0, sticky="nsew", pady=(0, 5), padx=5)
 
         # Set up network recovery handler in the uploader
-        if hasattr(self.uploader, 'set_network_recovery_callback'):
-            self.uploader.set_network_recovery_callback(self.handle_network_recovery)
+        self.uploader.set_network_recovery_callback(self.handle_network_recovery)
 
     def handle_network_recovery(self):
         """Handle network recovery events with enhanced visual feedback and better logging"""
         # Count failed uploads for better user feedback
-        failed_count = 0
-        if hasattr(self.uploader, 'failed_uploads_details'):
-            failed_count = len(self.uploader.failed_uploads_details)
-        elif hasattr(self, 'failed_uploads'):
-            failed_count = len(self.failed_uploads)
+        failed_count = len(self.uploader.failed_uploads_details)
 
         # Log with comprehensive information (instead of multiple similar logs)
         recovery_message = f"Network connection restored! Auto-retrying {failed_count} failed uploads." if failed_count > 0 else "Network connection restored! Resuming uploads."
-        self.log_frame.log(recovery_message, "success")
+        self.log_frame.log(recovery_message, level="success")
             
         # Show visual recovery animation
         self.progress_frame.indicate_network_recovery()
 
-        # Update status indicator with animated effect
-        def animate_recovery():
+        # Update status indicator with animated effect, one scheduled callback per frame
+        status_message = f"Network Restored - Auto-Retrying {failed_count} files" if failed_count > 0 else "Network Restored - Resuming"
+        self.root.after(0, self._recovery_step, 0, status_message)
+
+    def _recovery_step(self, step: int, status_message: str):
+        """Draw one frame of the network recovery animation and schedule the next"""
+        if step == 0:
             # First show the recovery state
-            self.root.after(0, lambda: self.status_indicator.configure(
-                text="↻", 
-                text_color=ThemeColors.SUCCESS
-            ))
-            self.root.after(0, lambda: self.status_text.configure(
-                text=f"Network Restored - Auto-Retrying {failed_count} files" if failed_count > 0 else "Network Restored - Resuming"
-            ))
+            self.status_text.configure(text=status_message)
 
+        if step < 6:
             # Animate the status indicator to show activity
-            for i in range(6):
-                self.root.after(i*300, lambda idx=i: self.status_indicator.configure(
-                    text="↻" if idx % 2 == 0 else "⟳",
-                    text_color=ThemeColors.SUCCESS
-                ))
-
-            # After animation, restore normal active status
-            self.root.after(2000, lambda: self.status_indicator.configure(
-                text="●", 
+            self.status_indicator.configure(
+                text="↻" if step % 2 == 0 else "⟳",
                 text_color=ThemeColors.SUCCESS
-            ))
-            self.root.after(2000, lambda: self.status_text.configure(
-                text="Uploading"
-            ))
+            )
+            self.root.after(300, self._recovery_step, step + 1, status_message)
+            return
 
-        threading.Thread(target=animate_recovery, daemon=True).start()
+        # After animation, restore normal active status
+        self.status_indicator.configure(text="●", text_color=ThemeColors.SUCCESS)
+        self.status_text.configure(text="Uploading")
 
     def bind_callbacks(self):
         self.upload_callbacks = {
@@ -249,14 +355,14 @@ class FolderFortSync:
         # For network recovery, only log and don't show popup (reduce popup clutter)
         if "Network connection restored" in message:
             # Just log it without any popup - we'll show visual indicators only
-            self.log_frame.log(message, "info")
-            self.log_frame.log("Auto-retry in progress. No manual action needed!", "success")
+            self.log_frame.log(message, level="info")
+            self.log_frame.log("Auto-retry in progress. No manual action needed!", level="success")
             
             # Show recovery animation
             self.progress_frame.indicate_network_recovery()
         else:
             # For other notices, just log them without popup
-            self.log_frame.log(message, "info")
+            self.log_frame.log(message, level="info")
 
     def show_message(self, message: str, level: str = "info"):
         """Show message to user and log it"""
@@ -266,7 +372,7 @@ class FolderFortSync:
             messagebox.showwarning("Warning", message)
         else:
             messagebox.showinfo("Information", message)
-        self.log_frame.log(message, level)
+        self.log_frame.log(message, level=level)
 
     def browse_folder(self):
         folder = filedialog.askdirectory()
@@ -280,11 +386,11 @@ class FolderFortSync:
         server_url = self.control_panel.get_server_url()
 
         if not api_token:
-            self.log_frame.log("Please enter API token first", "error")
+            self.log_frame.log("Please enter API token first", level="error")
             return
 
         if not server_url:
-            self.log_frame.log("Please enter server URL first", "error")
+            self.log_frame.log("Please enter server URL first", level="error")
             return
 
         # Show loading indicator
@@ -294,23 +400,33 @@ class FolderFortSync:
         # Update without blocking UI
         def do_refresh():
             try:
-                self.folder_manager = FolderManager(api_token, server_url)
-                folders = self.folder_manager.list_folders()
+                # Keep the pooled connection, but always fetch a fresh root listing
+                manager = self._get_folder_manager(api_token, server_url)
+                manager.invalidate_listing()
+                folders = manager.list_folders()
                 folder_names = list(folders.keys())
 
                 # Update UI from main thread
                 self.root.after(0, lambda: self.control_panel.update_cloud_folders(folder_names))
-                self.root.after(0, lambda: self.log_frame.log("Cloud folders refreshed successfully", "success"))
+                self.root.after(0, lambda: self.log_frame.log("Cloud folders refreshed successfully", level="success"))
                 self.root.after(0, lambda: self.status_indicator.configure(text="●", text_color=ThemeColors.SUCCESS))
                 self.root.after(0, lambda: self.status_text.configure(text="Ready"))
             except Exception as e:
                 error_msg = str(e)
-                self.root.after(0, lambda: self.log_frame.log(f"Failed to refresh folders: {error_msg}", "error"))
+                self.root.after(0, lambda: self.log_frame.log(f"Failed to refresh folders: {error_msg}", level="error"))
                 self.root.after(0, lambda: self.status_indicator.configure(text="●", text_color=ThemeColors.ERROR))
                 self.root.after(0, lambda: self.status_text.configure(text="Error refreshing folders"))
 
         threading.Thread(target=do_refresh, daemon=True).start()
 
+    def clear_upload_cache(self):
+        """Forget which files were uploaded, e.g. after they were deleted on the server"""
+        confirmation = messagebox.askyesno(
+            "Confirmation", "Clear the upload cache? The next sync will upload every file again.")
+        if confirmation:
+            self.uploader.upload_cache.clear()
+            self.log_frame.log("Upload cache cleared", level="info")
+
     def start_sync(self):
         api_token = self.control_panel.get_api_token()
         server_url = self.control_panel.get_server_url()
@@ -318,7 +434,7 @@ class FolderFortSync:
         selected_cloud_folder = self.control_panel.get_selected_cloud_folder()
 
         if not all([api_token, server_url, folder_path, selected_cloud_folder]):
-            self.log_frame.log("Please provide API token, server URL, local folder path, and select a cloud destination", "error")
+            self.log_frame.log("Please provide API token, server URL, local folder path, and select a cloud destination", level="error")
             return
 
         # Update status with visual cue
@@ -330,8 +446,7 @@ class FolderFortSync:
         self.is_stopping = False
 
         # Reset the uploader's progress tracking
-        if hasattr(self.uploader, 'total_uploaded'):
-            self.uploader.total_uploaded = 0
+        self.uploader.total_uploaded = 0
 
         # Reset progress bar to 0
         self.progress_frame.progress_var.set(0)
@@ -349,33 +464,38 @@ class FolderFortSync:
         self.progress_frame.indicate_activity()
 
         # Clear any previous failed uploads
-        if hasattr(self.uploader, 'failed_uploads_details'):
-            self.uploader.failed_uploads_details = []
-        self.failed_uploads = []
+        self.uploader.failed_uploads_details.clear()
+        self._clear_failed_uploads()
 
         # Stop any existing uploader threads before starting new ones
-        if hasattr(self.uploader, 'stop'):
-            try:
-                self.uploader.stop()
-            except:
-                pass
+        try:
+            self.uploader.stop()
+        except:
+            pass
 
         # Create a fresh uploader instance for this new sync session
         self.uploader = FileUploader()
+        self.uploader.enable_dedupe_probe = self.control_panel.get_skip_existing()
 
         # Restore network recovery callback
-        if hasattr(self.uploader, 'set_network_recovery_callback'):
-            self.uploader.set_network_recovery_callback(self.handle_network_recovery)
+        self.uploader.set_network_recovery_callback(self.handle_network_recovery)
 
-        # Create the folder manager and prepare sync
+        # Get the folder manager and prepare sync
         try:
-            self.folder_manager = FolderManager(api_token, server_url)
+            self._get_folder_manager(api_token, server_url)
             # Start sync in separate thread
             threading.Thread(target=self._sync_process, daemon=True).start()
         except Exception as e:
             self.status_indicator.configure(text="●", text_color=ThemeColors.ERROR)
             self.status_text.configure(text="Setup Failed")
-            self.log_frame.log(f"Failed to initialize sync: {str(e)}", "error")
+            self.log_frame.log(f"Failed to initialize sync: {str(e)}", level="error")
+
+    def _get_folder_manager(self, api_token: str, server_url: str) -> FolderManager:
+        """Reuse the current folder manager and its cached listings while the credentials are unchanged"""
+        manager = self.folder_manager
+        if manager is None or manager.api_token != api_token or manager.base_url != server_url:
+            manager = self.folder_manager = FolderManager(api_token, server_url)
+        return manager
 
     def _sync_process(self):
         try:
@@ -387,7 +507,7 @@ class FolderFortSync:
             cloud_folder_id = cloud_folders.get(selected_cloud_folder)
 
             if not cloud_folder_id:
-                self.log_frame.log(f"Could not find cloud folder: {selected_cloud_folder}", "error")
+                self.log_frame.log("Could not find cloud folder: %s", selected_cloud_folder, level="error")
                 return
 
             # Check if user wants to preserve parent folder structure
@@ -397,138 +517,169 @@ class FolderFortSync:
             if preserve_parent:
                 # Get parent folder name from the selected path
                 parent_folder_name = os.path.basename(folder_path)
-                self.log_frame.log(f"Using parent folder name: {parent_folder_name}")
+                self.log_frame.log("Using parent folder name: %s", parent_folder_name)
 
                 # Check if parent folder already exists
                 existing_folders = self.folder_manager.list_folders(cloud_folder_id)
 
                 if parent_folder_name in existing_folders:
                     parent_folder_id = existing_folders[parent_folder_name]
-                    self.log_frame.log(f"Using existing parent folder: {parent_folder_name} (ID: {parent_folder_id})")
+                    self.log_frame.log("Using existing parent folder: %s (ID: %s)", parent_folder_name, parent_folder_id)
                 else:
                     # Create the parent folder (folder_manager will handle short names)
                     parent_folder_id = self.folder_manager.create_folder(parent_folder_name, cloud_folder_id)
                     if parent_folder_id:
-                        self.log_frame.log(f"Created parent folder: {parent_folder_name} (ID: {parent_folder_id})")
+                        self.log_frame.log("Created parent folder: %s (ID: %s)", parent_folder_name, parent_folder_id)
                     else:
-                        self.log_frame.log(f"Failed to create parent folder. Using destination folder instead.", "warning")
+                        self.log_frame.log("Failed to create parent folder. Using destination folder instead.", level="warning")
                         parent_folder_id = cloud_folder_id
             else:
-                self.log_frame.log(f"Using destination folder directly without creating parent folder.")
+                self.log_frame.log("Using destination folder directly without creating parent folder.")
 
             # Create folder structure for subfolders
             self.log_frame.log("Creating folder structure...")
             folder_map = self.folder_manager.ensure_folder_structure(folder_path, parent_folder_id)
 
-            # Collect files for upload
-            files_to_upload = []
-            for root, _, files in os.walk(folder_path):
-                for file in files:
-                    full_path = os.path.join(root, file)
-
-                    # Calculate relative path from base folder
-                    rel_path = os.path.relpath(root, folder_path)
-
-                    # Normalize path for consistent lookup
-                    norm_rel_path = rel_path.replace("\\", "/")
-                    if norm_rel_path == ".":
-                        norm_rel_path = ""
+            # Start upload workers first so uploads begin while the tree is still being walked
+            self.uploader.start_upload_workers(self.control_panel.get_api_token())
+            server_url = self.control_panel.get_server_url()
+            api_token = self.control_panel.get_api_token()
 
-                    # Get the folder ID for this path
-                    target_id = folder_map.get(norm_rel_path, parent_folder_id)
-
-                    # Debug log to see which parent folder is being used
-                    self.log_frame.log(f"File: {file} - Located at: {norm_rel_path} - Will upload to folder ID: {target_id}")
-
-                    files_to_upload.append((full_path, target_id))
+            # Queue files as they are found; completion isn't reported until the scan is done
+            self._scan_finished = False
+            total_files = 0
+            try:
+                for file_path, target_id, file_stat in self._iter_files(folder_path, folder_map, parent_folder_id):
+                    if self.uploader.stop_flag.is_set():
+                        break  # Sync was stopped while the folder was still being scanned
+                    self.uploader.queue_upload(
+                        file_path,
+                        target_id,
+                        server_url,
+                        api_token,
+                        self.upload_callbacks,
+                        folder_path,
+                        file_stat
+                    )
+                    total_files += 1
+                    if total_files % QUEUE_LOG_INTERVAL == 0:
+                        self.log_frame.log("Queued %d files...", total_files)
+            finally:
+                self._scan_finished = True
 
-            total_files = len(files_to_upload)
-            self.log_frame.log(f"Found {total_files} files to upload")
+            self.log_frame.log("Found %d files to upload", total_files)
 
             # Check if we have any files to upload
             if total_files == 0:
-                self.log_frame.log("No files found to upload. Please check the selected folder.", "warning")
+                self.log_frame.log("No files found to upload. Please check the selected folder.", level="warning")
                 # Show a message box to ensure user sees it
                 self.show_message("No files found to upload. Please check that the selected folder contains files.", "warning")
                 return
 
-            # Start upload workers
-            self.uploader.start_upload_workers()
-
-            # Queue files for upload
-            for file_path, parent_id in files_to_upload:
-                self.uploader.queue_upload(
-                    file_path,
-                    parent_id,
-                    self.control_panel.get_server_url(),
-                    self.control_panel.get_api_token(),
-                    self.upload_callbacks,
-                    folder_path
-                )
-
             # Wait for completion
             self.uploader.upload_queue.join()
+            self.uploader.upload_cache.flush()
 
-            self.show_summary()
+            self.show_summary(total_files)
 
         except Exception as e:
-            self.log_frame.log(f"Sync error: {str(e)}", "error")
+            self.log_frame.log("Sync error: %s", e, level="error")
+
+    def _iter_files(self, folder_path: str, folder_map: Dict[str, int], parent_folder_id: int):
+        """Yield (file path, target folder ID, stat result) for every file below folder_path"""
+        stack = [(folder_path, "")]
+        while stack:
+            path, rel_path = stack.pop()
+            # Folder map keys are relative paths with '/' separators, "" for the base folder
+            target_id = folder_map.get(rel_path, parent_folder_id)
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            # Symlinked directories aren't descended into, matching os.walk
+                            if not entry.is_symlink():
+                                stack.append((entry.path, f"{rel_path}/{entry.name}" if rel_path else entry.name))
+                            continue
+                        try:
+                            file_stat = entry.stat()
+                        except OSError:
+                            file_stat = None  # The uploader reports files it can't read
+                        yield entry.path, target_id, file_stat
+            except OSError as e:
+                self.log_frame.log("Could not read folder %s: %s", path, e, level="warning")
 
     def handle_upload_success(self, file_path: str, speed: float):
         # Use consistent log format with timestamp generated in the log method
-        self.log_frame.log(f"Uploaded: {os.path.basename(file_path)}", "success")
+        self.log_frame.log("Uploaded: %s", os.path.basename(file_path), level="success")
+
+        completed = self.uploader.total_uploaded
+        remaining = self.uploader.pending_uploads()
 
         # Update progress
-        self.progress_frame.update_progress(
-            self.uploader.total_uploaded,
-            self.uploader.upload_queue.qsize() + self.uploader.total_uploaded,
-            speed
-        )
+        self.progress_frame.update_progress(completed, completed + remaining, speed)
 
         # Update status bar
-        remaining = self.uploader.upload_queue.qsize()
-        self.status_text.configure(
-            text=f"Uploading: {self.uploader.total_uploaded} completed, {remaining} remaining")
+        if self._scan_finished:
+            self._set_upload_status(f"Uploading: {completed} completed, {remaining} remaining")
+        else:
+            self._set_upload_status(f"Uploading: {completed} completed, {remaining} queued so far (still scanning)")
 
         # Update the progress frame status to SYNCING on first upload
-        if self.uploader.total_uploaded == 1:
+        if completed == 1:
             # Ensure we show SYNCING instead of PROCESSING - Use green for active uploads
             self.progress_frame.status_indicator.configure(text="SYNCING", text_color=ThemeColors.SUCCESS)
             # Change progress bar color to green (SUCCESS) when actually syncing
             self.progress_frame.progress_bar.configure(progress_color=ThemeColors.SUCCESS)
 
-        # If this was the last file, update status
-        if remaining == 0:
+        # If this was the last file and nothing more will be queued, update status
+        if self._scan_finished and remaining == 0:
             self.status_text.configure(text="Upload complete!")
 
+    def _set_upload_status(self, text: str):
+        """Show per-file progress in the status bar, skipping unchanged text and rapid repeats"""
+        now = time.monotonic()
+        if text == self._last_status_text or now - self._status_last_update < STATUS_UPDATE_INTERVAL:
+            return
+        self.status_text.configure(text=text)
+        self._last_status_text = text
+        self._status_last_update = now
+
+    def _add_failed_upload(self, item: str):
+        """Record a failed upload entry once, keeping the list order for retries"""
+        if item not in self._failed_upload_set:
+            self._failed_upload_set.add(item)
+            self.failed_uploads.append(item)
+
+    def _clear_failed_uploads(self):
+        self.failed_uploads = []
+        self._failed_upload_set = set()
+
     def handle_upload_error(self, error: str):
-        self.log_frame.log(error, "error")
+        self.log_frame.log(error, level="error")
 
         # Store the original error message
-        if error not in self.failed_uploads:
-            self.failed_uploads.append(error)
+        self._add_failed_upload(error)
 
         # Extract and store the file path for easier retry
-        if isinstance(error, str) and "Upload error for " in error:
-            try:
-                # Extract file path from the error message
-                parts = error.split("Upload error for ")
-                if len(parts) > 1:
-                    file_path = parts[1].split(":")[0].strip()
-
-                    # Store the file path directly if it exists and isn't already in the list
-                    if os.path.exists(file_path) and file_path not in self.failed_uploads:
-                        self.failed_uploads.append(file_path)
-                        print(f"Added file path to failed_uploads for retry: {file_path}")
-            except Exception as e:
-                print(f"Error extracting file path from error message: {str(e)}")
-                # If extraction fails, we still have the original error message
+        if isinstance(error, str):
+            # Messages look like "Upload error for <path>: <reason>"; splitting on ": " keeps
+            # Windows drive letters ("C:\...") in the path
+            _, found, rest = error.partition(UPLOAD_ERROR_PREFIX)
+            if found:
+                file_path = rest.partition(": ")[0].strip()
+
+                # Store the file path directly; retry checks that it still exists
+                if file_path not in self._failed_upload_set:
+                    self._add_failed_upload(file_path)
+                    logger.debug("Added file path to failed_uploads for retry: %s", file_path)
 
     def handle_upload_progress(self, current: int, total: int, speed: float):
         self.progress_frame.update_progress(current, total, speed)
 
     def pause_sync(self):
         """Pause sync with proper visual animation transitions - using same mechanism as stop"""
+        self._cancel_resume_checks()
+
         # First update buttons (disable pause, enable resume)
         self.control_panel.update_button_states(paused=True)
 
@@ -543,22 +694,16 @@ class FolderFortSync:
         # Show PAUSING animation first - critical for proper visual feedback
         self.progress_frame.indicate_pausing()
 
-        # Force immediate UI update
-        self.root.update_idletasks()
-
         # Log the pause action
-        self.log_frame.log("⏸️ Sync pausing...", "warning")
+        self.log_frame.log("⏸️ Sync pausing...", level="warning")
 
         # Get current active threads BEFORE pausing
-        active_thread_count = 0
-        active_threads = []
-        if hasattr(self.uploader, 'upload_threads'):
-            active_threads = [t for t in self.uploader.upload_threads if t.is_alive()]
-            active_thread_count = len(active_threads)
+        active_threads = self.uploader.active_threads()
+        active_thread_count = len(active_threads)
 
         # Log the actual number of active threads
         if active_thread_count > 0:
-            self.log_frame.log(f"⚠️ Note: {active_thread_count} active uploads may complete before fully paused", "warning")
+            self.log_frame.log(f"⚠️ Note: {active_thread_count} active uploads may complete before fully paused", level="warning")
 
         # Start pause in a separate thread with longer animation timeout
         threading.Thread(target=lambda: self._pause_sync_thread(active_threads), daemon=True).start()
@@ -569,78 +714,30 @@ class FolderFortSync:
             # Set the pause flag in the uploader
             self.uploader.pause()
 
-            # Console warning with actual thread count
-            print(f"Upload pausing - flag set")
-            print(f"Pause flag status: {self.uploader.pause_flag.is_set()}")
-            print(f"Tracking {len(active_threads)} active threads until they complete")
+            # Note the files that were in flight when pause was clicked
+            in_progress = [os.path.basename(t.current_file) for t in active_threads
+                           if getattr(t, 'current_file', None)]
+            logger.debug("Pause tracking: waiting for %d files in progress: %s", len(in_progress), in_progress)
+            if in_progress:
+                self.log_frame.log(f"Pausing - waiting for active uploads to complete...", level="info")
 
-            # Now track thread status with shorter timeout (0.8 seconds)
-            self._track_active_threads_for_pause(active_threads, max_wait=0.8)
+            # Workers signal the uploader as they finish, so this blocks instead of polling from the UI
+            if not self.uploader.wait_for_pause(timeout=PAUSE_SETTLE_TIMEOUT):
+                logger.warning("Uploads still in progress after %ss; showing paused anyway", PAUSE_SETTLE_TIMEOUT)
+            self.root.after(0, self._on_pause_settled)
 
         except Exception as e:
-            self.log_frame.log(f"Error pausing sync: {str(e)}", "error")
+            self.log_frame.log(f"Error pausing sync: {str(e)}", level="error")
             # Always ensure UI shows paused state
             self.root.after(100, self._transition_to_fully_paused)
 
-    def _track_active_threads_for_pause(self, active_threads, max_wait=3.0):
-        """Track specific file uploads that were in progress when pause was clicked"""
-        # First time setup - get the names of files being uploaded when pause was clicked
-        if not hasattr(self, '_files_being_uploaded_at_pause'):
-            # Get the actual filenames from the upload queue
-            self._files_being_uploaded_at_pause = []
-
-            # Get files being actively uploaded by threads
-            for thread in active_threads:
-                if hasattr(thread, 'current_file') and thread.current_file:
-                    filename = os.path.basename(thread.current_file)
-                    self._files_being_uploaded_at_pause.append(filename)
-                    print(f"Thread {thread.name} is uploading: {filename}")
-
-            # If we couldn't get specific files, fallback to counting
-            if not self._files_being_uploaded_at_pause:
-                active_count = len(active_threads)
-                self._active_thread_count_at_pause = active_count
-                print(f"Couldn't get filenames, tracking {active_count} active threads instead")
-
-            print(f"Pause tracking: tracking {len(self._files_being_uploaded_at_pause)} specific files in progress")            
-            # Log the state for clarity
-            self.log_frame.log(f"Pausing - waiting for active uploads to complete...", "info")
-
-        # Simple check - see if any tracked files are still being uploaded
-        files_still_uploading = False
-
-        # Check which specific files are still being uploaded
-        for thread in [t for t in active_threads if t.is_alive()]:
-            if hasattr(thread, 'current_file') and thread.current_file:
-                filename = os.path.basename(thread.current_file)
-                if filename in self._files_being_uploaded_at_pause:
-                    files_still_uploading = True
-                    print(f"Still uploading tracked file: {filename}")
-
-        # Fallback if we couldn't track specific files - check if thread count decreased
-        if not self._files_being_uploaded_at_pause and hasattr(self, '_active_thread_count_at_pause'):
-            current_active = len([t for t in active_threads if t.is_alive()])
-            if current_active < self._active_thread_count_at_pause:
-                files_still_uploading = False
-            else:
-                files_still_uploading = True
-
-        # Check if we should transition to fully paused state
-        transition_to_paused = not files_still_uploading
+    def _on_pause_settled(self):
+        """Show the fully paused state once the uploads in flight at pause time are done"""
+        if not self.uploader.pause_flag.is_set():
+            return  # Resumed or stopped while waiting
 
-        if transition_to_paused:
-            # Update UI to fully paused state
-            self.log_frame.log("All active uploads at pause time have completed", "info")
-            self._transition_to_fully_paused("all tracked uploads completed")
-
-            # Clean up tracking variables
-            if hasattr(self, '_files_being_uploaded_at_pause'):
-                delattr(self, '_files_being_uploaded_at_pause')
-            if hasattr(self, '_active_thread_count_at_pause'):
-                delattr(self, '_active_thread_count_at_pause')
-        else:
-            # Continue checking at short intervals
-            self.root.after(100, lambda: self._track_active_threads_for_pause(active_threads))
+        self.log_frame.log("All active uploads at pause time have completed", level="info")
+        self._transition_to_fully_paused("all tracked uploads completed")
 
     def _transition_to_fully_paused(self, reason=""):
         """Synchronized transition to fully paused state - uses same logic as stop to fully stopped"""
@@ -657,8 +754,8 @@ class FolderFortSync:
         )
 
         # Log pause completion
-        self.log_frame.log("⏸️ Sync paused", "warning")
-        self.log_frame.log("➡️ Click RESUME to continue upload", "info")
+        self.log_frame.log("⏸️ Sync paused", level="warning")
+        self.log_frame.log("➡️ Click RESUME to continue upload", level="info")
 
         # Set final state flag
         self.is_pausing = False
@@ -671,34 +768,14 @@ class FolderFortSync:
 
     def _ensure_pause_ui_consistency(self):
         """Make sure all UI elements are in sync for pause state"""
-        try:
-            # Force consistent state across all UI elements
-            if not self.is_paused:
-                return  # User already resumed
-
-            # Status indicators
-            self.status_indicator.configure(text="⏸", text_color=ThemeColors.WARNING)
-            self.status_text.configure(text="Paused")
-
-            # Progress frame
-            self.progress_frame.is_pausing = False
-            self.progress_frame.is_paused = True
-            self.progress_frame.status_indicator.configure(text="PAUSED", text_color=ThemeColors.WARNING)
-            self.progress_frame.progress_bar.configure(progress_color=ThemeColors.WARNING)
-            self.progress_frame.speed_var.set("Paused")
-            self.progress_frame.eta_var.set("Paused")
-            self.progress_frame.speed_icon.configure(text="⏸", text_color=ThemeColors.WARNING)
-
-            # Force UI update
-            self.progress_frame.update_idletasks()
-            self.root.update_idletasks()
-
-            print("Pause UI consistency ensured")
-        except Exception as e:
-            print(f"Error ensuring pause UI consistency: {e}")
+        if not self.is_paused:
+            return  # User already resumed
+        self._apply_ui_state("paused")
 
     def resume_sync(self):
         """Resume uploads with synchronized UI updates"""
+        self._cancel_resume_checks()
+
         # Clear the paused flag immediately
         self.is_paused = False
 
@@ -710,90 +787,101 @@ class FolderFortSync:
             # First update text status for immediate feedback
             self.status_indicator.configure(text="●", text_color=ThemeColors.SUCCESS)
             self.status_text.configure(text="Resuming...")
-            self.root.update_idletasks()  # Force immediate update
 
             # Now transition progress frame with animation
             self.progress_frame.indicate_resumed()
-            self.root.update_idletasks()  # Force immediate update
 
             # Log the resume action
-            self.log_frame.log("▶️ Sync resumed", "success")
+            self.log_frame.log("▶️ Sync resumed", level="success")
 
             # Resume the actual upload operations after UI updates
             try:
                 self.uploader.resume()
                 self.status_text.configure(text="Uploading")
             except Exception as e:
-                self.log_frame.log(f"Error resuming uploads: {str(e)}", "error")
+                self.log_frame.log(f"Error resuming uploads: {str(e)}", level="error")
 
             # Ensure UI consistency
-            self.root.after(100, self._ensure_resume_ui_consistency)
+            self._resume_check_ids.append(self.root.after(100, self._ensure_resume_ui_consistency))
 
             # Verify uploads are working after a delay
-            threading.Timer(1.0, self._check_upload_progress).start()
+            self._resume_check_ids.append(self.root.after(1000, self._check_upload_progress))
         except Exception as e:
-            self.log_frame.log(f"Error updating UI for resume: {str(e)}", "error")
+            self.log_frame.log(f"Error updating UI for resume: {str(e)}", level="error")
             # Basic fallback
             self.status_text.configure(text="Uploading")
 
+    def _cancel_resume_checks(self):
+        """Drop post-resume checks that a later pause or stop has made stale"""
+        for after_id in self._resume_check_ids:
+            self.root.after_cancel(after_id)
+        self._resume_check_ids.clear()
+
     def _ensure_resume_ui_consistency(self):
         """Make sure all UI elements are in sync for resume state"""
-        try:
-            if self.is_paused:
-                return  # User paused again
+        if self.is_paused:
+            return  # User paused again
+        self._apply_ui_state("syncing")
 
-            # Force consistent state across all UI elements
-            self.status_indicator.configure(text="●", text_color=ThemeColors.SUCCESS)
-            self.status_text.configure(text="Uploading")
+    def _apply_ui_state(self, state_name: str):
+        """Configure the status bar and progress frame for one of the UI_STATES in a single pass"""
+        try:
+            state = UI_STATES[state_name]
+            progress = self.progress_frame
 
-            # Progress frame - use green (SUCCESS) for active syncing
-            self.progress_frame.is_paused = False
-            self.progress_frame.is_pausing = False
-            self.progress_frame.status_indicator.configure(text="SYNCING", text_color=ThemeColors.SUCCESS)
-            self.progress_frame.progress_bar.configure(progress_color=ThemeColors.SUCCESS)  # Green for active syncing
-            self.progress_frame.speed_icon.configure(text="↑", text_color=ThemeColors.SUCCESS)  # Green for active syncing
+            # Status indicators
+            self.status_indicator.configure(text=state["icon"], text_color=state["color"])
+            self.status_text.configure(text=state["status_text"])
 
-            # Force UI update
-            self.progress_frame.update_idletasks()
-            self.root.update_idletasks()
+            # Progress frame
+            for flag, value in state["flags"].items():
+                setattr(progress, flag, value)
+            progress.status_indicator.configure(text=state["progress_status"], text_color=state["color"])
+            progress.progress_bar.configure(progress_color=state["color"])
+            if state["speed"] is not None:
+                progress.speed_var.set(state["speed"])
+                progress.eta_var.set(state["eta"])
+            progress.speed_icon.configure(text=state["speed_icon"], text_color=state["color"])
+
+            print(f"{state_name.capitalize()} UI consistency ensured")
         except Exception as e:
-            print(f"Error ensuring resume UI consistency: {e}")
+            print(f"Error ensuring {state_name} UI consistency: {e}")
 
     def _check_upload_progress(self):
         """Check if uploads are progressing after resume"""
-        if hasattr(self.uploader, 'upload_threads'):
-            active_threads = [t for t in self.uploader.upload_threads if t.is_alive()]
+        active_threads = self.uploader.active_threads()
 
-            if len(active_threads) == 0:
-                self.log_frame.log("No active upload threads detected. Restarting workers...", "warning")
-                self.uploader.start_upload_workers()
+        if len(active_threads) == 0:
+            self.log_frame.log("No active upload threads detected. Restarting workers...", level="warning")
+            self.uploader.start_upload_workers()
 
-                # Schedule another check to verify restart worked
-                threading.Timer(1.0, self._verify_restart).start()
-            else:
-                # Make sure pause flag is definitely cleared
-                if self.uploader.pause_flag.is_set() and not self.is_paused:
-                    self.log_frame.log("Pause flag still set despite resume. Clearing it again...", "warning")
-                    self.uploader.pause_flag.clear()
+            # Schedule another check to verify restart worked
+            self._resume_check_ids.append(self.root.after(1000, self._verify_restart))
+        else:
+            # Make sure pause flag is definitely cleared
+            if self.uploader.pause_flag.is_set() and not self.is_paused:
+                self.log_frame.log("Pause flag still set despite resume. Clearing it again...", level="warning")
+                self.uploader.pause_flag.clear()
 
-                self.log_frame.log(f"Upload progress checked: {len(active_threads)} active threads", "info")
+            self.log_frame.log(f"Upload progress checked: {len(active_threads)} active threads", level="info")
 
     def _verify_restart(self):
         """Verify that upload threads restarted properly"""
-        if hasattr(self.uploader, 'upload_threads'):
-            active_threads = [t for t in self.uploader.upload_threads if t.is_alive()]
-            if len(active_threads) == 0 and not self.is_paused:
-                self.log_frame.log("Upload threads failed to restart. Trying one more time...", "warning")
-                # Try a more aggressive restart
-                self.uploader.stop()
-                time.sleep(0.2)  # Shorter delay for responsiveness
-                self.uploader.start_upload_workers()
+        active_threads = self.uploader.active_threads()
+        if len(active_threads) == 0 and not self.is_paused:
+            self.log_frame.log("Upload threads failed to restart. Trying one more time...", level="warning")
+            # Try a more aggressive restart
+            self.uploader.stop()
+            # Shorter delay for responsiveness
+            self._resume_check_ids.append(self.root.after(200, self.uploader.start_upload_workers))
 
     def stop_sync(self):
         """Stop sync with proper visual animation transitions"""
         # Confirm before stopping
         confirmation = messagebox.askyesno("Confirmation", "Are you sure you want to stop the sync process?")
         if confirmation:
+            self._cancel_resume_checks()
+
             # Set stopping state
             self.is_stopping = True
 
@@ -805,30 +893,28 @@ class FolderFortSync:
             # This starts the blinking animation and "STOPPING" text
             self.progress_frame.indicate_stopping()
 
-            # Force immediate UI update
-            self.root.update_idletasks()
-
             # Log the stop action
-            self.log_frame.log("⏹️ Sync stopping...", "error")
+            self.log_frame.log("⏹️ Sync stopping...", level="error")
 
             # Get current active threads BEFORE stopping
-            active_thread_count = 0
-            active_threads = []
-            if hasattr(self.uploader, 'upload_threads'):
-                active_threads = [t for t in self.uploader.upload_threads if t.is_alive()]
-                active_thread_count = len(active_threads)
+            active_threads = self.uploader.active_threads()
+            active_thread_count = len(active_threads)
 
             # Log the actual number of active threads
             if active_thread_count > 0:
-                self.log_frame.log(f"⚠️ Note: {active_thread_count} active uploads may complete before fully stopped", "warning")
+                self.log_frame.log(f"⚠️ Note: {active_thread_count} active uploads may complete before fully stopped", level="warning")
 
             # Stop all uploads in a separate thread, but with longer animation timeout
             # to ensure proper visual feedback
-            threading.Thread(target=lambda: self._stop_sync_thread(active_threads, force_kill=True), daemon=True).start()
+            threading.Thread(target=lambda: self._stop_sync_thread(active_threads), daemon=True).start()
 
-    def _stop_sync_thread(self, active_threads, force_kill=True):
-        """Stop the uploader and force terminate all active threads"""
+    def _stop_sync_thread(self, active_threads):
+        """Stop the uploader; workers see its stop flag and exit on their own"""
         try:
+            # Note what was uploading before stop() runs: workers clear current_file as they finish
+            uploading = [(t, t.current_file) for t in active_threads if getattr(t, 'current_file', None)]
+            deadline = time.monotonic() + STOP_JOIN_TIMEOUT
+
             # Stop the uploader (this will terminate worker threads)
             self.uploader.stop()
 
@@ -837,78 +923,42 @@ class FolderFortSync:
             print(f"Stop flag status: True")
             print(f"Tracking {len(active_threads)} active threads until they complete")
 
-            # If force_kill is enabled, try to interrupt threads immediately
-            if force_kill and active_threads:
-                # Allow a very brief moment for clean termination
-                time.sleep(0.2)
-
-                # Force kill any remaining threads
-                still_active = [t for t in active_threads if t.is_alive()]
-                if still_active:
-                    print(f"Force terminating {len(still_active)} remaining threads")
-                    for t in still_active:
-                        try:
-                            if hasattr(t, '_Thread__stop'):
-                                t._Thread__stop()
-                        except:
-                            pass  # Best effort only
-
-            # Now track thread status with shorter timeout (0.8 seconds)
-            self._track_active_threads_for_stop(active_threads, max_wait=0.8)
+            # Now wait for the uploads that were in flight
+            self._track_active_threads_for_stop(uploading, deadline)
 
         except Exception as e:
-            self.log_frame.log(f"Error stopping sync: {str(e)}", "error")
+            self.log_frame.log(f"Error stopping sync: {str(e)}", level="error")
             # Always ensure UI shows stopped state
             self.root.after(100, self._transition_to_fully_stopped)
 
-    def _track_active_threads_for_stop(self, active_threads, max_wait=3.0):
-        """Track specific file uploads that were in progress when stop was clicked"""
-        # First time setup - get the names of files being uploaded when stop was clicked
-        if not hasattr(self, '_files_being_uploaded_at_stop'):
-            self._files_being_uploaded_at_stop = []
-            for thread in active_threads:
-                if hasattr(thread, 'current_file') and thread.current_file:
-                    filename = os.path.basename(thread.current_file)
-                    self._files_being_uploaded_at_stop.append(filename)
-                    print(f"Thread {thread.name} is uploading: {filename}")
-
-            # Fallback if we couldn't get specific files
-            if not self._files_being_uploaded_at_stop:
-                active_count = len(active_threads)
-                self._active_thread_count_at_stop = active_count
-                print(f"Couldn't get filenames, tracking {active_count} active threads instead")
-
-            print(f"Stop tracking: tracking {len(self._files_being_uploaded_at_stop)} specific files in progress")
-            self.log_frame.log(f"Stopping - waiting for active uploads to complete...", "info")
-
-        files_still_uploading = False
-        for thread in [t for t in active_threads if t.is_alive()]:
-            if hasattr(thread, 'current_file') and thread.current_file:
-                filename = os.path.basename(thread.current_file)
-                if filename in self._files_being_uploaded_at_stop:
-                    files_still_uploading = True
-                    print(f"Still uploading tracked file: {filename}")
-
-        #Fallback if we couldn't track specific files
-        if not self._files_being_uploaded_at_stop and hasattr(self, '_active_thread_count_at_stop'):
-            current_active = len([t for t in active_threads if t.is_alive()])
-            if current_active < self._active_thread_count_at_stop:
-                files_still_uploading = False
-            else:
-                files_still_uploading = True
-
-        transition_to_stopped = not files_still_uploading
-
-        if transition_to_stopped:
-            self.log_frame.log("All active uploads at stop time have completed", "info")
-            self._transition_to_fully_stopped("all tracked uploads completed")
-
-            if hasattr(self, '_files_being_uploaded_at_stop'):
-                delattr(self, '_files_being_uploaded_at_stop')
-            if hasattr(self, '_active_thread_count_at_stop'):
-                delattr(self, '_active_thread_count_at_stop')
+    def _track_active_threads_for_stop(self, uploading, deadline: float):
+        """Wait until deadline for the uploads that were in progress when stop was clicked, then show the stopped state"""
+        # Runs on the stop thread, so waiting here never ties up the UI
+        for thread, file_path in uploading:
+            print(f"Thread {thread.name} is uploading: {os.path.basename(file_path)}")
+        print(f"Stop tracking: tracking {len(uploading)} specific files in progress")
+
+        if uploading:
+            self.log_frame.log("Stopping - waiting for active uploads to complete...", level="info")
+            for thread, _ in uploading:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                thread.join(timeout=remaining)
+
+        # A worker stuck in a network call must not keep the UI in the stopping state forever
+        still_uploading = [os.path.basename(file_path) for thread, file_path in uploading if thread.is_alive()]
+        self.root.after(0, self._on_stop_settled, still_uploading)
+
+    def _on_stop_settled(self, still_uploading):
+        """Show the fully stopped state once the uploads in flight at stop time are done or timed out"""
+        if still_uploading:
+            self.log_frame.log("Stopped without waiting for %d unfinished uploads: %s",
+                               len(still_uploading), ", ".join(still_uploading), level="warning")
+            self._transition_to_fully_stopped("timed out waiting for tracked uploads")
         else:
-            self.root.after(100, lambda: self._track_active_threads_for_stop(active_threads))
+            self.log_frame.log("All active uploads at stop time have completed", level="info")
+            self._transition_to_fully_stopped("all tracked uploads completed")
 
     def _transition_to_fully_stopped(self, reason=""):
         """Synchronized transition to fully stopped state"""
@@ -925,8 +975,8 @@ class FolderFortSync:
         )
 
         # Log stop completion
-        self.log_frame.log("✓ Sync fully stopped", "error")
-        self.log_frame.log("➡️ Click START to begin a new upload", "info")
+        self.log_frame.log("✓ Sync fully stopped", level="error")
+        self.log_frame.log("➡️ Click START to begin a new upload", level="info")
 
         # Clear stopping state
         self.is_stopping = False
@@ -941,30 +991,7 @@ class FolderFortSync:
 
     def _ensure_stop_ui_consistency(self):
         """Make sure all UI elements are in sync for stopped state"""
-        try:
-            # Force consistent state across all UI elements
-            self.status_indicator.configure(text="⏹", text_color=ThemeColors.ERROR)
-            self.status_text.configure(text="Stopped")
-
-            # Progress frame
-            if hasattr(self.progress_frame, 'is_stopping'):
-                self.progress_frame.is_stopping = False
-            if hasattr(self.progress_frame, 'is_stopped'):
-                self.progress_frame.is_stopped = True
-
-            self.progress_frame.status_indicator.configure(text="STOPPED", text_color=ThemeColors.ERROR)
-            self.progress_frame.progress_bar.configure(progress_color=ThemeColors.ERROR)
-            self.progress_frame.speed_var.set("Stopped")
-            self.progress_frame.eta_var.set("Click START for new upload")
-            self.progress_frame.speed_icon.configure(text="⏹", text_color=ThemeColors.ERROR)
-
-            # Force UI update
-            self.progress_frame.update_idletasks()
-            self.root.update_idletasks()
-
-            print("Stop UI consistency ensured")
-        except Exception as e:
-            print(f"Error ensuring stop UI consistency: {e}")
+        self._apply_ui_state("stopped")
 
     def _show_reset_button(self):
         """Show a reset button after stopping - NO animations, NO transparency"""
@@ -976,10 +1003,15 @@ class FolderFortSync:
             # Make sure upload button is also removed if it exists
             if hasattr(self, 'new_upload_button'):
                 self._safely_destroy_upload_button()
-                
-            # Wait a tiny bit to ensure destruction completed
-            time.sleep(0.05)
-            
+
+            # Old buttons are destroyed from a 20ms after() callback, so create the new one after that
+            self.root.after(BUTTON_SWAP_DELAY_MS, self._create_reset_button)
+        except Exception as e:
+            print(f"Error creating reset button: {e}")
+
+    def _create_reset_button(self):
+        """Create and fade in the reset button once any previous buttons are gone"""
+        try:
             # Create a reset button that appears after stopping
             self.reset_button = StylishButton(
                 self.progress_frame,
@@ -1017,28 +1049,27 @@ class FolderFortSync:
             # Start with background color (not "transparent") to avoid errors
             self.reset_button.configure(fg_color=bg_color, text_color=bg_color)
 
-            # Fade in over 5 steps
+            # Fade in over 5 steps, scheduled on the event loop so the UI stays responsive
             steps = 5
-            for i in range(1, steps+1):
-                # Calculate opacity
-                opacity = i / steps
+
+            def animate_frame(step):
+                if not hasattr(self, 'reset_button') or not self.reset_button.winfo_exists():
+                    return
+
+                if step > steps:
+                    # Ensure final state is correct
+                    self.reset_button.configure(fg_color=original_fg, text_color=original_text)
+                    return
 
                 # Blend colors with background for fade effect
+                opacity = step / steps
                 fg_color = self._blend_colors(bg_color, original_fg, opacity)
                 text_color = self._blend_colors(bg_color, original_text, opacity)
-
-                # Apply colors
                 self.reset_button.configure(fg_color=fg_color, text_color=text_color)
-                self.reset_button.update_idletasks()
-
-                # Short delay between steps
-                time.sleep(0.03)
 
-            # Ensure final state is correct
-            self.reset_button.configure(fg_color=original_fg, text_color=original_text)
+                self.root.after(30, animate_frame, step + 1)
 
-            # Add subtle bounce if desired
-            self._add_subtle_bounce_to_reset_button()
+            animate_frame(1)
         except Exception as e:
             print(f"Error in button fade animation: {e}")
             # Fallback - just show the button
@@ -1048,38 +1079,6 @@ class FolderFortSync:
             except:
                 pass
 
-    def _add_subtle_bounce_to_reset_button(self):
-        """Add a very subtle bounce effect for extra polish"""
-        try:
-            if not hasattr(self, 'reset_button') or not self.reset_button.winfo_exists():
-                return
-
-            # Define subtle bounce keyframes (scale values)
-            bounce_scales = [1.0, 1.05, 1.0]
-            bounce_times = [0, 80, 150]  # milliseconds
-
-            # Apply each scale with appropriate timing
-            for i, scale in enumerate(bounce_scales):
-                self.root.after(bounce_times[i], 
-                    lambda s=scale: self._apply_button_scale(s))
-        except Exception as e:
-            print(f"Error adding button bounce: {e}")
-
-    def _apply_button_scale(self, scale):
-        """Apply scale effect to button"""
-        try:
-            if hasattr(self, 'reset_button') and self.reset_button.winfo_exists():
-                # Calculate new dimensions
-                orig_width = 150
-                orig_height = 30
-                new_width = int(orig_width * scale)
-                new_height = int(orig_height * scale)
-
-                # Apply new dimensions, keeping button centered
-                self.reset_button.configure(width=new_width, height=new_height)
-        except Exception as e:
-            print(f"Error scaling button: {e}")
-
     def _reset_after_stop(self):
         """Reset the UI to default state after stopping"""
         try:
@@ -1218,7 +1217,7 @@ class FolderFortSync:
             self._animate_status_to_ready()
 
             # Log the reset action
-            self.log_frame.log("🔄 Progress reset. Ready for new upload.", "success")
+            self.log_frame.log("🔄 Progress reset. Ready for new upload.", level="success")
         except Exception as e:
             print(f"Error in reset completion: {e}")
             # Basic fallback
@@ -1262,11 +1261,13 @@ class FolderFortSync:
             # If there's a significant amount to animate, do it smoothly
             if current > 0.05:
                 steps = 8
-                for i in range(steps+1):
-                    progress = current * (1 - (i/steps))
-                    self.progress_frame.progress_var.set(progress)
-                    if i < steps:  # Don't sleep on the last iteration
-                        time.sleep(0.01)  # Quick but visible
+
+                def animate_progress(step):
+                    self.progress_frame.progress_var.set(current * (1 - (step/steps)))
+                    if step < steps:
+                        self.root.after(10, animate_progress, step + 1)  # Quick but visible
+
+                animate_progress(0)
             else:
                 # Just set to 0 directly
                 self.progress_frame.progress_var.set(0)
@@ -1277,17 +1278,24 @@ class FolderFortSync:
             self.progress_frame.eta_var.set("Calculating...")
 
             # Reset colors smoothly
-            if self.progress_frame.progress_bar.cget("progress_color") != ThemeColors.ACCENT:
+            current_color = self.progress_frame.progress_bar.cget("progress_color")
+            target_color = ThemeColors.ACCENT
+            if current_color == target_color:
+                pass  # Already reset
+            elif _color_distance(current_color, target_color) < MIN_ANIMATED_COLOR_DISTANCE:
+                # Too close to see a transition, so just snap to the target
+                self.progress_frame.progress_bar.configure(progress_color=target_color)
+            else:
                 # Animate color transition
-                current_color = self.progress_frame.progress_bar.cget("progress_color")
-                target_color = ThemeColors.ACCENT
                 steps = 6
-                for i in range(steps+1):
-                    blend = i/steps
-                    color = self._blend_colors(current_color, target_color, blend)
+
+                def animate_color(step):
+                    color = self._blend_colors(current_color, target_color, step/steps)
                     self.progress_frame.progress_bar.configure(progress_color=color)
-                    if i < steps:  # Don't sleep on the last iteration
-                        time.sleep(0.01)  # Quick but visible
+                    if step < steps:
+                        self.root.after(10, animate_color, step + 1)  # Quick but visible
+
+                animate_color(0)
 
             # Reset state with blank status text
             self.progress_frame.status_indicator.configure(text="", text_color=ThemeColors.TEXT_PRIMARY)
@@ -1302,9 +1310,6 @@ class FolderFortSync:
 
             # Reset speed icon
             self.progress_frame.speed_icon.configure(text="↑", text_color=ThemeColors.ACCENT)
-
-            # Force update
-            self.progress_frame.update_idletasks()
         except Exception as e:
             print(f"Error in reset_progress_frame: {e}")
             # Basic fallback
@@ -1326,17 +1331,17 @@ class FolderFortSync:
         self.log_frame.log("Retrying failed uploads...")
 
         # Check if structured failed upload details exist in the uploader
-        if hasattr(self.uploader, 'failed_uploads_details') and self.uploader.failed_uploads_details:
+        if self.uploader.failed_uploads_details:
             structured_retry = True
             retry_items = self.uploader.failed_uploads_details
-            self.log_frame.log(f"Found {len(retry_items)} structured failed uploads to retry", "info")
+            self.log_frame.log(f"Found {len(retry_items)} structured failed uploads to retry", level="info")
         # Fall back to legacy method if no structured data
         elif self.failed_uploads:
             structured_retry = False
             retry_items = self.failed_uploads
-            self.log_frame.log(f"Found {len(retry_items)} unstructured failed uploads to retry", "info")
+            self.log_frame.log(f"Found {len(retry_items)} unstructured failed uploads to retry", level="info")
         else:
-            self.log_frame.log("No failed uploads to retry", "warning")
+            self.log_frame.log("No failed uploads to retry", level="warning")
             return
 
         # Process failed uploads
@@ -1349,10 +1354,10 @@ class FolderFortSync:
                 target_folder_id = item['target_folder_id']
 
                 if os.path.exists(file_path) and os.path.isfile(file_path):
-                    self.log_frame.log(f"Retrying upload: {os.path.basename(file_path)}", "info")
+                    self.log_frame.log(f"Retrying upload: {os.path.basename(file_path)}", level="info")
 
                     # Make sure upload workers are running
-                    if not self.uploader.upload_threads or not any(t.is_alive() for t in self.uploader.upload_threads):
+                    if not self.uploader.active_threads():
                         self.uploader.start_upload_workers()
 
                     # Re-queue the upload using stored folder ID
@@ -1370,7 +1375,7 @@ class FolderFortSync:
                     # Remove from the list after queuing
                     retry_items.remove(item)
                 else:
-                    self.log_frame.log(f"File no longer exists: {file_path}", "warning")
+                    self.log_frame.log(f"File no longer exists: {file_path}", level="warning")
                     retry_items.remove(item)
         else:
             # Legacy method - extract file paths from error messages
@@ -1382,21 +1387,20 @@ class FolderFortSync:
                     if os.path.exists(item) and os.path.isfile(item):
                         # This is a direct file path
                         extracted_file_paths.append(item)
-                        self.log_frame.log(f"Found file to retry: {os.path.basename(item)}", "info")
+                        self.log_frame.log(f"Found file to retry: {os.path.basename(item)}", level="info")
                         continue
 
                     # Try to extract file path from error message
-                    if "Upload error for " in item:
-                        parts = item.split("Upload error for ")
-                        if len(parts) > 1:
-                            file_path = parts[1].split(":")[0].strip()
-                            if os.path.exists(file_path) and os.path.isfile(file_path):
-                                extracted_file_paths.append(file_path)
-                                self.log_frame.log(f"Found file to retry: {os.path.basename(file_path)}", "info")
+                    _, found, rest = item.partition(UPLOAD_ERROR_PREFIX)
+                    if found:
+                        file_path = rest.partition(": ")[0].strip()
+                        if os.path.isfile(file_path):
+                            extracted_file_paths.append(file_path)
+                            self.log_frame.log(f"Found file to retry: {os.path.basename(file_path)}", level="info")
 
             # If we couldn't extract paths, notify user
             if not extracted_file_paths:
-                self.log_frame.log("Could not find valid files to retry from the error list.", "warning")
+                self.log_frame.log("Could not find valid files to retry from the error list.", level="warning")
                 return
 
             # Retry each file using the legacy mechanism
@@ -1413,12 +1417,12 @@ class FolderFortSync:
                     server_url = self.control_panel.get_server_url()
 
                     if not api_token or not server_url:
-                        self.log_frame.log("Missing API token or server URL", "error")
+                        self.log_frame.log("Missing API token or server URL", level="error")
                         return
 
-                    self.folder_manager = FolderManager(api_token, server_url)
+                    self._get_folder_manager(api_token, server_url)
                 except Exception as e:
-                    self.log_frame.log(f"Failed to initialize folder manager: {str(e)}", "error")
+                    self.log_frame.log(f"Failed to initialize folder manager: {str(e)}", level="error")
                     return
 
             try:
@@ -1427,7 +1431,7 @@ class FolderFortSync:
                 cloud_folder_id = cloud_folders.get(selected_cloud_folder)
 
                 if not cloud_folder_id:
-                    self.log_frame.log(f"Could not find cloud folder: {selected_cloud_folder}", "error")
+                    self.log_frame.log(f"Could not find cloud folder: {selected_cloud_folder}", level="error")
                     return
 
                 # Get parent folder ID if it exists
@@ -1437,21 +1441,21 @@ class FolderFortSync:
                 existing_folders = self.folder_manager.list_folders(cloud_folder_id)
                 if parent_folder_name in existing_folders:
                     parent_folder_id = existing_folders[parent_folder_name]
-                    self.log_frame.log(f"Found parent folder: {parent_folder_name} (ID: {parent_folder_id})", "info")
+                    self.log_frame.log(f"Found parent folder: {parent_folder_name} (ID: {parent_folder_id})", level="info")
 
                 if not parent_folder_id:
-                    self.log_frame.log("Could not find parent folder ID. Using destination folder instead.", "warning")
+                    self.log_frame.log("Could not find parent folder ID. Using destination folder instead.", level="warning")
                     parent_folder_id = cloud_folder_id
 
                 # Start upload workers if needed
-                if not hasattr(self.uploader, 'upload_threads') or not any(t.is_alive() for t in self.uploader.upload_threads):
-                    self.log_frame.log("Starting upload workers for retry operation", "info")
+                if not self.uploader.active_threads():
+                    self.log_frame.log("Starting upload workers for retry operation", level="info")
                     self.uploader.start_upload_workers()
 
                 # Retry each file
                 for file_path in extracted_file_paths:
                     if os.path.exists(file_path):
-                        self.log_frame.log(f"Queuing {os.path.basename(file_path)} for retry", "info")
+                        self.log_frame.log(f"Queuing {os.path.basename(file_path)} for retry", level="info")
                         self.uploader.queue_upload(
                             file_path,
                             parent_folder_id,
@@ -1461,35 +1465,34 @@ class FolderFortSync:
                             folder_path
                         )
                     else:
-                        self.log_frame.log(f"File no longer exists: {file_path}", "error")
-
-                # Clear the processed items from the failed uploads list
-                for path in extracted_file_paths:
-                    if path in self.failed_uploads:
-                        self.failed_uploads.remove(path)
+                        self.log_frame.log(f"File no longer exists: {file_path}", level="error")
 
-                # Also clear any error messages for files we've processed
+                # Clear the processed paths and any error messages mentioning them
                 self.failed_uploads = [item for item in self.failed_uploads if not any(
                     path in str(item) for path in extracted_file_paths
                 )]
+                self._failed_upload_set = set(self.failed_uploads)
 
             except Exception as e:
-                self.log_frame.log(f"Error during retry process: {str(e)}", "error")
+                self.log_frame.log(f"Error during retry process: {str(e)}", level="error")
                 return
 
         # Show result
         if retry_count > 0:
-            self.log_frame.log(f"Started retry for {retry_count} files", "success")
+            self.log_frame.log(f"Started retry for {retry_count} files", level="success")
 
             # Animate the progress bar to indicate activity
             self.progress_frame.indicate_activity()
         else:
-            self.log_frame.log("No valid files found to retry", "warning")
+            self.log_frame.log("No valid files found to retry", level="warning")
 
-    def show_summary(self):
-        total = self.uploader.total_uploaded + len(self.failed_uploads)
-        failed = len(self.failed_uploads)
+    def show_summary(self, total: int):
+        # failed_uploads holds both the error and the extracted path, so failures are derived from the total
         successful = self.uploader.total_uploaded
+        failed = max(total - successful, 0)
+
+        # The last upload may have finished before the scan did, so mark completion here too
+        self.status_text.configure(text="Upload complete!")
 
         # Play a subtle completion animation
         self._play_completion_animation()
@@ -1516,10 +1519,15 @@ class FolderFortSync:
             # Make sure reset button is also removed if it exists
             if hasattr(self, 'reset_button'):
                 self._safely_destroy_reset_button()
-                
-            # Wait a tiny bit to ensure destruction completed
-            time.sleep(0.05)
 
+            # Old buttons are destroyed from a 20ms after() callback, so create the new one after that
+            self.root.after(BUTTON_SWAP_DELAY_MS, self._create_new_upload_button)
+        except Exception as e:
+            print(f"Error creating new upload button: {e}")
+
+    def _create_new_upload_button(self):
+        """Create and fade in the new upload button once any previous buttons are gone"""
+        try:
             # Create a "New Upload" button that appears after completion
             self.new_upload_button = StylishButton(
                 self.progress_frame,
@@ -1558,28 +1566,30 @@ class FolderFortSync:
             bg_color = ThemeColors.BG_PRIMARY
             self.new_upload_button.configure(fg_color=bg_color, text_color=bg_color)
 
-            # Fade in over 5 steps
+            # Fade in over 5 steps, scheduled on the event loop so the UI stays responsive
             steps = 5
-            for i in range(1, steps+1):
-                # Calculate opacity
-                opacity = i / steps
+
+            def animate_frame(step):
+                if not hasattr(self, 'new_upload_button') or not self.new_upload_button.winfo_exists():
+                    return
+
+                if step > steps:
+                    # Ensure final state is correct
+                    self.new_upload_button.configure(fg_color=original_fg, text_color=original_text)
+
+                    # Add subtle bounce if desired
+                    self._add_subtle_bounce_to_new_button()
+                    return
 
                 # Blend colors with background for fade effect
+                opacity = step / steps
                 fg_color = self._blend_colors("transparent", original_fg, opacity)
                 text_color = self._blend_colors("transparent", original_text, opacity)
-
-                # Apply colors
                 self.new_upload_button.configure(fg_color=fg_color, text_color=text_color)
-                self.new_upload_button.update_idletasks()
-
-                # Short delay between steps
-                time.sleep(0.03)
 
-            # Ensure final state is correct
-            self.new_upload_button.configure(fg_color=original_fg, text_color=original_text)
+                self.root.after(30, animate_frame, step + 1)
 
-            # Add subtle bounce if desired
-            self._add_subtle_bounce_to_new_button()
+            animate_frame(1)
         except Exception as e:
             print(f"Error in button fade animation: {e}")
             # Fallback - just show the button
@@ -1798,19 +1808,18 @@ class FolderFortSync:
             self.status_text.configure(text="Ready for New Upload")
 
             # Log the reset action
-            self.log_frame.log("🔄 Ready for new upload", "success")
+            self.log_frame.log("🔄 Ready for new upload", level="success")
 
             # Create a fresh uploader instance
             self.uploader = FileUploader()
 
             # Restore network recovery callback
-            if hasattr(self.uploader, 'set_network_recovery_callback'):
-                self.uploader.set_network_recovery_callback(self.handle_network_recovery)
+            self.uploader.set_network_recovery_callback(self.handle_network_recovery)
 
             # Reset state flags
             self.is_paused = False
             self.is_stopping = False
-            self.failed_uploads = []
+            self._clear_failed_uploads()
 
         except Exception as e:
             print(f"Error in reset for new upload: {e}")
@@ -1863,31 +1872,10 @@ class FolderFortSync:
 
     def _blend_colors(self, color1, color2, blend_factor):
         """Helper to blend colors for animations"""
-        try:
-            # Check if colors are valid hex strings
-            if not isinstance(color1, str) or not isinstance(color2, str):
-                return ThemeColors.BG_PRIMARY if blend_factor > 0.5 else ThemeColors.BG_SECONDARY
-
-            if not color1.startswith('#') or not color2.startswith('#'):
-                return ThemeColors.BG_PRIMARY
-
-            if len(color1) != 7 or len(color2) != 7:
-                return ThemeColors.BG_PRIMARY
-
-            # Convert hex to RGB
-            r1, g1, b1 = int(color1[1:3], 16), int(color1[3:5], 16), int(color1[5:7], 16)
-            r2, g2, b2 = int(color2[1:3], 16), int(color2[3:5], 16), int(color2[5:7], 16)
-
-            # Linear interpolation
-            r = int(r1 + (r2 - r1) * blend_factor)
-            g = int(g1 + (g2 - g1) * blend_factor)
-            b = int(b1 + (b2 - b1) * blend_factor)
-
-            # Convert back to hex
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except Exception as e:
-            print(f"Error blending colors: {e}")
-            return ThemeColors.BG_PRIMARY
+        # Check if colors are valid hex strings
+        if not isinstance(color1, str) or not isinstance(color2, str):
+            return ThemeColors.BG_PRIMARY if blend_factor > 0.5 else ThemeColors.BG_SECONDARY
+        return _blend_hex_colors(color1, color2, blend_factor)
 
     def run(self):
         # Show welcome message with animated entry
@@ -1905,7 +1893,7 @@ class FolderFortSync:
 
             # Log messages directly without popups
             for i, (msg, level) in enumerate(messages):
-                self.root.after(i*800, lambda idx=i: self.log_frame.log(messages[idx][0], messages[idx][1]))
+                self.root.after(i*800, lambda idx=i: self.log_frame.log(messages[idx][0], level=messages[idx][1]))
 
             # Subtle animation for the status indicator
             colors = [ThemeColors.ACCENT, ThemeColors.SUCCESS]
@@ -1927,6 +1915,11 @@ class FolderFortSync:
         self.root.mainloop()
 
 if __name__ == "__main__":
+    log_listener = setup_logging()
     app = FolderFortSync()
-    app.run()
+    try:
+        app.run()
+    finally:
+        app.uploader.upload_cache.close()
+        log_listener.stop()
     
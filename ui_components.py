@@ -8,6 +8,23 @@ import threading
 from pathlib import Path
 import colorsys
 import random
+from collections import deque
+
+# Log entries are written to the activity log in batches at most this often
+LOG_FLUSH_INTERVAL_MS = 50
+LOG_BUFFER_SIZE = 5000
+# Debug entries are dropped before formatting unless this is enabled
+LOG_DEBUG = False
+
+LOG_ICONS = {
+    "info": "ℹ️",
+    "success": "✅",
+    "error": "❌",
+    "warning": "⚠️",
+    "debug": "🔍"
+}
+# Levels with their own text color tags; anything else is shown in the info color
+LOG_LEVELS = ("info", "success", "error", "warning")
 
 class ThemeManager:
     """Manages theme colors with static dark theme (matte black aesthetic)"""
@@ -1287,8 +1304,15 @@ class LogFrame(ctk.CTkFrame):
         self.log_text.tag_config("error_text", foreground=ThemeColors.ERROR)
         self.log_text.tag_config("warning_text", foreground=ThemeColors.WARNING)
 
-    def log(self, message: str, level: str = "info"):
-        """Add a log entry with consistent, simplified colors and improved message handling"""
+        # Entries waiting for the next flush; the oldest are dropped if the UI falls far behind
+        self._pending_logs = deque(maxlen=LOG_BUFFER_SIZE)
+        self._log_flush_scheduled = False
+
+    def log(self, message: str, *args, level: str = "info"):
+        """Add a log entry; printf-style args are only formatted when the entry is written"""
+        if level == "debug" and not LOG_DEBUG:
+            return
+
         # Get current timestamp with milliseconds for uniqueness
         timestamp = time.strftime("%H:%M:%S")
 
@@ -1296,43 +1320,41 @@ class LogFrame(ctk.CTkFrame):
         ms = int((time.time() % 1) * 1000)
         unique_timestamp = f"{timestamp}.{ms:03d}"
 
-        # Determine icon based on log level
-        icons = {
-            "info": "ℹ️",
-            "success": "✅",
-            "error": "❌",
-            "warning": "⚠️",
-            "debug": "🔍"
-        }
-        icon = icons.get(level, "•")
+        # Entries are buffered and written together, so a burst of uploads costs one redraw
+        self._pending_logs.append((unique_timestamp, level, message, args))
+        if not self._log_flush_scheduled:
+            self._log_flush_scheduled = True
+            self.after(LOG_FLUSH_INTERVAL_MS, self._flush_logs)
+
+    def _flush_logs(self):
+        """Write all buffered log entries to the text widget in one pass"""
+        # Reset first so entries added while draining schedule another flush
+        self._log_flush_scheduled = False
+        if not self._pending_logs:
+            return
 
         # Ensure log text is editable
         self.log_text.configure(state="normal")
 
-        # Add timestamp with consistent color (now with unique milliseconds)
-        self.log_text.insert("end", f"[{unique_timestamp}] ", "timestamp")
-
-        # Add icon with color based on level
-        self.log_text.insert("end", f"{icon} ", f"{level}_icon")
-
-        # Add message with color based on level
-        if level == "info":
-            self.log_text.insert("end", message, "info_text")
-        elif level == "success":
-            self.log_text.insert("end", message, "success_text")
-        elif level == "error":
-            self.log_text.insert("end", message, "error_text")
-        elif level == "warning":
-            self.log_text.insert("end", message, "warning_text")
-        else:
-            # Default to info color for unknown levels
-            self.log_text.insert("end", message, "info_text")
-
-        # Add newline
-        self.log_text.insert("end", "\n")
-
-        # Make log text read-only again
-        self.log_text.configure(state="disabled")
+        try:
+            while self._pending_logs:
+                unique_timestamp, level, message, args = self._pending_logs.popleft()
+                if args:
+                    try:
+                        message = message % args
+                    except (TypeError, ValueError):
+                        # A mismatched format (e.g. a literal % in a path) must not drop the rest of the batch
+                        message = f"{message} {args}"
+
+                # Add timestamp with consistent color (now with unique milliseconds)
+                self.log_text.insert("end", f"[{unique_timestamp}] ", "timestamp")
+
+                # Add icon and message with color based on level (unknown levels use the info color)
+                self.log_text.insert("end", f"{LOG_ICONS.get(level, '•')} ", f"{level}_icon")
+                self.log_text.insert("end", f"{message}\n", f"{level}_text" if level in LOG_LEVELS else "info_text")
+        finally:
+            # Make log text read-only again
+            self.log_text.configure(state="disabled")
 
         # Scroll to the end
         self.log_text.see("end")
@@ -1365,12 +1387,13 @@ class LogFrame(ctk.CTkFrame):
     def clear(self):
         """Clear the log content"""
         try:
-            # Clear all text
+            # Clear all text, including entries not yet written
+            self._pending_logs.clear()
             self.log_text.configure(state="normal")
             self.log_text.delete("1.0", "end")
 
             # Add success message
-            self.log("Log cleared ✓", "success")
+            self.log("Log cleared ✓", level="success")
             self.log_text.configure(state="disabled")
 
             # Visual feedback on button
@@ -1395,7 +1418,7 @@ class LogFrame(ctk.CTkFrame):
             try:
                 self.log_text.configure(state="normal")
                 self.log_text.delete("1.0", "end")
-                self.log("Log cleared ✓", "success")
+                self.log("Log cleared ✓", level="success")
                 self.log_text.configure(state="disabled")
                 self.clear_button.configure(text="🧹 Clear Log")
             except:
@@ -1564,9 +1587,43 @@ class ControlPanel(ctk.CTkFrame):
         refresh_btn.grid(row=3, column=2, padx=(0, 10), pady=row_padding)
         self._create_tooltip(refresh_btn, "Refresh cloud folder list")
 
-        # Control Buttons - Row 4
+        # Sync Options - Row 4
+        options_label = ctk.CTkLabel(
+            self,
+            text="Options",
+            font=("SF Pro Display", 13, "bold"),
+            text_color=ThemeColors.TEXT_SECONDARY,
+            width=label_width,
+            anchor="e"
+        )
+        options_label.grid(row=4, column=0, padx=(10, 10), pady=row_padding, sticky="e")
+
+        self.skip_existing = ctk.CTkCheckBox(
+            self,
+            text="Skip files already on the server",
+            font=("SF Pro Display", 13),
+            text_color=ThemeColors.TEXT_PRIMARY,
+            fg_color=ThemeColors.ACCENT,
+            hover_color=ThemeColors.ACCENT_LIGHT,
+            border_color=ThemeColors.BG_SECONDARY
+        )
+        self.skip_existing.grid(row=4, column=1, padx=(0, 10), pady=row_padding, sticky="w")
+        self._create_tooltip(self.skip_existing, "Check each cloud folder's listing and skip same-sized files stored after the local copy last changed")
+
+        clear_cache_btn = StylishButton(
+            self,
+            text="Clear Cache",
+            command=self.callbacks.get("clear_cache", lambda: None),
+            fg_color=ThemeColors.ACCENT,
+            hover_color=ThemeColors.ACCENT_LIGHT,
+            width=button_width
+        )
+        clear_cache_btn.grid(row=4, column=2, padx=(0, 10), pady=row_padding)
+        self._create_tooltip(clear_cache_btn, "Forget previously uploaded files so the next sync uploads everything again")
+
+        # Control Buttons - Row 5
         self.button_frame = ctk.CTkFrame(self, fg_color="transparent")
-        self.button_frame.grid(row=4, column=0, columnspan=3, pady=10, padx=10, sticky="ew")
+        self.button_frame.grid(row=5, column=0, columnspan=3, pady=10, padx=10, sticky="ew")
 
         # Container for button grid with some padding
         button_container = ctk.CTkFrame(self.button_frame, fg_color="transparent")
@@ -1718,6 +1775,9 @@ class ControlPanel(ctk.CTkFrame):
     def get_folder_path(self) -> str:
         return self.folder_path.get().strip()
 
+    def get_skip_existing(self) -> bool:
+        return bool(self.skip_existing.get())
+
     def update_button_states(self, paused=False):
         """Update button states based on sync status"""
         try:
@@ -0,0 +1,115 @@
+import os
+import logging
+import sqlite3
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".folderfortsync")
+CACHE_PATH = os.path.join(CACHE_DIR, "upload_cache.sqlite")
+
+# Recorded uploads are written to disk in one transaction per this many files
+CACHE_COMMIT_INTERVAL = 100
+
+class UploadCache:
+    """Remembers files that were already uploaded so unchanged files are skipped on re-sync
+
+    Entries are never invalidated: a file is skipped for as long as its mtime and size match,
+    even if the remote copy has since been deleted. clear() (the "Clear Cache" button) forces a
+    full re-upload.
+    """
+    def __init__(self, db_path: str = CACHE_PATH):
+        self.lock = threading.Lock()
+        # (server, folder_id, path) -> (mtime_ns, size, remote_id)
+        self._entries = {}
+        self._conn = None
+        self._uncommitted = 0  # Records written since the last commit
+
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "server TEXT, folder_id TEXT, path TEXT, mtime_ns INTEGER, size INTEGER, remote_id TEXT, "
+                "PRIMARY KEY (server, folder_id, path))"
+            )
+            for server, folder_id, path, mtime_ns, size, remote_id in self._conn.execute(
+                    "SELECT server, folder_id, path, mtime_ns, size, remote_id FROM uploads"):
+                self._entries[(server, folder_id, path)] = (mtime_ns, size, remote_id)
+        except sqlite3.Error as e:
+            # Keep working with an in-memory cache if the database can't be used
+            logger.warning("Upload cache database unavailable, using memory only: %s", e)
+            self._conn = None
+
+    def is_uploaded(self, server: str, folder_id: int, file_path: str, file_stat: os.stat_result) -> bool:
+        """Check whether this exact file version was already uploaded to the folder"""
+        entry = self._entries.get((server, str(folder_id), file_path))
+        return entry is not None and entry[0] == file_stat.st_mtime_ns and entry[1] == file_stat.st_size
+
+    def record(self, server: str, folder_id: int, file_path: str, file_stat: os.stat_result,
+               remote_id: Optional[str] = None):
+        """Remember a successful upload"""
+        key = (server, str(folder_id), file_path)
+        value = (file_stat.st_mtime_ns, file_stat.st_size, remote_id)
+        with self.lock:
+            self._entries[key] = value
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?)", key + value
+                )
+                self._uncommitted += 1
+                if self._uncommitted >= CACHE_COMMIT_INTERVAL:
+                    self._commit()
+            except sqlite3.Error as e:
+                logger.warning("Failed to save upload cache entry: %s", e)
+
+    def _commit(self):
+        """Write pending records to disk; call with self.lock held"""
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def flush(self):
+        """Write records not yet committed to disk"""
+        with self.lock:
+            if self._conn is None or not self._uncommitted:
+                return
+            try:
+                self._commit()
+            except sqlite3.Error as e:
+                logger.warning("Failed to save upload cache: %s", e)
+
+    def clear(self):
+        """Forget every recorded upload, so the next sync uploads all files again"""
+        with self.lock:
+            self._entries.clear()
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("DELETE FROM uploads")
+                self._commit()
+            except sqlite3.Error as e:
+                logger.warning("Failed to clear upload cache: %s", e)
+
+    def close(self):
+        """Write pending records and close the database connection; later records are kept in memory only"""
+        self.flush()
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def shared_upload_cache() -> UploadCache:
+    """The process-wide cache, so every sync run reuses one database connection"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = UploadCache()
+        return _shared_cache